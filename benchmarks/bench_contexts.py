@@ -0,0 +1,108 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+""" Benchmarks of the example animated contexts, tiled rendering and
+component blitting """
+
+import os
+import sys
+
+import numpy
+
+from enact.clock import VirtualClock
+
+from .timing import measure, result
+
+SIZES = [128, 256, 512, 1024]
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples')
+
+
+def _step_benchmarks(name, context_class, sizes):
+    from kiva.image import GraphicsContext
+    results = []
+    for size in sizes:
+        # a virtual clock, so that no heartbeats run during later timings
+        context = context_class(gc=GraphicsContext((size, size)),
+            clock=VirtualClock())
+        context.start()
+        context.stop()
+        frames = iter(range(10**9))
+        def step():
+            with context.gc_lock:
+                context.step(next(frames))
+        timing = measure(step)
+        results.append(result('context', name+'_step', timing, size=size))
+    return results
+
+
+def _tiling_benchmarks(sizes):
+    """ A Life-like neighbour sum, tiled over 1 thread and over all cores """
+    from multiprocessing import cpu_count
+    from enact.tiling import TiledRenderer
+    results = []
+    for size in sizes:
+        source = numpy.random.randint(0, 2, (size, size)).astype('float32')
+        target = numpy.empty((size, size, 4), dtype='uint8')
+        def neighbours(tile):
+            block = source[tile.halo_index]
+            total = block.copy()
+            total[1:] += block[:-1]
+            total[:-1] += block[1:]
+            total[:, 1:] += total[:, :-1].copy()
+            total[:, :-1] += total[:, 1:].copy()
+            target[tile.index + (0,)] = total[tile.inner]
+        for threads in sorted(set([1, cpu_count()])):
+            renderer = TiledRenderer(halo=1, threads=threads,
+                tile_shape=(max(size//(4*threads), 16), size))
+            timing = measure(lambda: renderer.render((size, size),
+                neighbours))
+            timing['speedup'] = renderer.speedup
+            timing['efficiency'] = renderer.efficiency
+            renderer.close()
+            results.append(result('tiling', 'neighbour_sum', timing,
+                size=size, threads=threads))
+    return results
+
+
+def benchmark(sizes=SIZES):
+    results = _tiling_benchmarks(sizes)
+    try:
+        from kiva.image import GraphicsContext
+        from enact.animated_component import AnimatedComponent
+    except ImportError:
+        return results
+
+    sys.path.insert(0, EXAMPLES)
+    sys.path.insert(0, os.path.join(EXAMPLES, 'line_integral_kernel'))
+    try:
+        from life import Life
+        results.extend(_step_benchmarks('life', Life, sizes))
+        try:
+            from lic_example import LineIntegralConvolution
+        except ImportError:
+            # the Cython extension has not been built
+            pass
+        else:
+            results.extend(_step_benchmarks('lic', LineIntegralConvolution,
+                sizes))
+    finally:
+        del sys.path[:2]
+
+    for size in sizes:
+        context = Life(gc=GraphicsContext((size, size)),
+            clock=VirtualClock())
+        context.start()
+        context.stop()
+        component = AnimatedComponent(animated_context=context,
+            bounds=(size, size))
+        target = GraphicsContext((size, size))
+        timing = measure(lambda: component._draw_mainlayer(target))
+        results.append(result('component', 'draw_mainlayer', timing,
+            size=size))
+    return results
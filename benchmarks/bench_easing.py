@@ -0,0 +1,54 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+""" Benchmarks of the easing functions """
+
+import numpy
+
+from enact.easing import easing_functions, easing_curves
+
+from .timing import measure, result
+
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+
+def benchmark(sizes=SIZES):
+    results = []
+    for name in sorted(easing_functions):
+        ease = easing_functions[name]
+        if name.startswith('list_'):
+            initial, final = list(range(10)), list(range(20))
+        elif name.startswith('array_'):
+            initial, final = numpy.zeros(10), numpy.ones(20)
+        else:
+            initial, final = 0, 100
+        timing = measure(lambda: ease(0.5, initial, final))
+        results.append(result('easing', name, timing, kind='scalar'))
+
+        if name.startswith('list_'):
+            continue
+        for size in sizes:
+            initial = numpy.zeros(size)
+            final = numpy.ones(size)
+            timing = measure(lambda: ease(0.5, initial, final))
+            results.append(result('easing', name, timing, kind='array',
+                size=size))
+            prepare = getattr(ease, 'prepare', None)
+            if prepare is not None:
+                prepared = prepare(initial, final)
+                timing = measure(lambda: prepared(0.5))
+                results.append(result('easing', name, timing,
+                    kind='prepared', size=size))
+
+    for name in sorted(easing_curves):
+        curve = easing_curves[name]
+        for size in sizes:
+            t = numpy.linspace(0.0, 1.0, size)
+            timing = measure(lambda: curve(t))
+            results.append(result('easing_curve', name, timing,
+                kind='array_t', size=size))
+    return results
@@ -0,0 +1,75 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+""" Benchmarks of the transition manager and transitions """
+
+import numpy
+
+from traits.api import HasTraits, Float
+
+from enact.clock import VirtualClock
+from enact.transition import AttributeTransition, PlotDataTransition
+from enact.transition_manager import TransitionManager
+from enact.transition_pool import AttributeTransitionPool
+
+from .timing import measure, result
+
+COUNTS = [1, 10, 100, 1000, 10000]
+
+ARRAY_SIZES = [10**3, 10**4, 10**5, 10**6]
+
+
+class Target(HasTraits):
+
+    value = Float
+
+
+def _running_manager(add_transitions):
+    """ A manager on a virtual clock whose transitions never finish """
+    clock = VirtualClock(interval=1e-9)
+    manager = TransitionManager(clock=clock)
+    add_transitions(manager)
+    listeners = [manager.listener]
+    clock.tick(listeners)
+    return lambda: clock.tick(listeners)
+
+
+def benchmark(counts=COUNTS, array_sizes=ARRAY_SIZES):
+    results = []
+    for count in counts:
+        def add_transitions(manager):
+            for i in range(count):
+                manager.connect(AttributeTransition(obj=Target(),
+                    attr='value', final=1.0, duration=1e6))
+        timing = measure(_running_manager(add_transitions))
+        results.append(result('transition_manager', 'attribute_tick', timing,
+            transitions=count))
+
+        def add_pool(manager):
+            pool = AttributeTransitionPool(transition_manager=manager)
+            for i in range(count):
+                pool.add(Target(), 'value', 1.0, duration=1e6)
+        timing = measure(_running_manager(add_pool))
+        results.append(result('transition_manager', 'pool_tick', timing,
+            transitions=count))
+
+    try:
+        from chaco.api import ArrayPlotData
+    except ImportError:
+        return results
+
+    for size in array_sizes:
+        for ease in ['linear', 'array_linear']:
+            def add_plot_data(manager):
+                plot_data = ArrayPlotData(x=numpy.zeros(size))
+                manager.connect(PlotDataTransition(plot_data=plot_data,
+                    data_key='x', final=numpy.ones(size), duration=1e6,
+                    ease=ease))
+            timing = measure(_running_manager(add_plot_data))
+            results.append(result('plot_data_transition', ease+'_tick',
+                timing, size=size))
+    return results
@@ -0,0 +1,106 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+""" Run the enact benchmarks and write the results as JSON
+
+Usage::
+
+    python -m benchmarks.run_benchmarks [--quick] [--output results.json]
+        [--compare baseline.json] [--threshold 0.2]
+
+With --compare, each result is compared against the result with the same
+group, name and parameters in the baseline file, and any which are slower
+by more than the threshold fraction are reported as regressions; the exit
+status is then 1 if there were any.
+"""
+
+import sys
+import json
+import time
+import platform
+from optparse import OptionParser
+
+import numpy
+
+from . import bench_contexts, bench_easing, bench_transitions
+
+
+def run(quick=False):
+    if quick:
+        results = (
+            bench_easing.benchmark(sizes=[10**3, 10**5]) +
+            bench_transitions.benchmark(counts=[1, 100],
+                array_sizes=[10**3, 10**5]) +
+            bench_contexts.benchmark(sizes=[128])
+        )
+    else:
+        results = (
+            bench_easing.benchmark() +
+            bench_transitions.benchmark() +
+            bench_contexts.benchmark()
+        )
+    return {
+        'metadata': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def _result_key(record):
+    return (record['group'], record['name'],
+        tuple(sorted(record['params'].items())))
+
+
+def compare(results, baseline, threshold):
+    """ Return (key, old, new) for results slower than the baseline """
+    old_times = dict((_result_key(record), record['seconds'])
+        for record in baseline['results'])
+    regressions = []
+    for record in results['results']:
+        old = old_times.get(_result_key(record))
+        if old and record['seconds'] > old*(1.0+threshold):
+            regressions.append((_result_key(record), old, record['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = OptionParser()
+    parser.add_option('--quick', action='store_true', default=False,
+        help='run a reduced set of sizes')
+    parser.add_option('--output', help='file to write results to')
+    parser.add_option('--compare', help='baseline results file')
+    parser.add_option('--threshold', type='float', default=0.2,
+        help='fractional slowdown counted as a regression')
+    options, args = parser.parse_args(argv)
+
+    results = run(options.quick)
+    output = json.dumps(results, indent=1, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as fp:
+            fp.write(output)
+    else:
+        sys.stdout.write(output + '\n')
+
+    if options.compare:
+        with open(options.compare) as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, options.threshold)
+        for key, old, new in regressions:
+            sys.stderr.write('REGRESSION %s: %.3g s -> %.3g s\n' %
+                (key, old, new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
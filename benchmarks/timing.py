@@ -0,0 +1,31 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+""" Timing helpers shared by the benchmarks """
+
+import timeit
+
+
+def measure(func, repeat=3, min_time=0.05):
+    """ Time a function call, returning the best time per call in seconds
+
+    The number of calls per measurement is chosen so that a measurement
+    takes about `min_time` seconds, then the best of `repeat` measurements
+    is taken.
+    """
+    timer = timeit.Timer(func)
+    first = timer.timeit(1)
+    number = max(1, min(int(min_time/max(first, 1e-9)), 1000000))
+    best = min(timer.repeat(repeat, number))
+    return {'seconds': best/number, 'number': number, 'repeat': repeat}
+
+
+def result(group, name, timing, **params):
+    """ Build a result record """
+    record = {'group': group, 'name': name, 'params': params}
+    record.update(timing)
+    return record
@@ -6,29 +6,115 @@
 # LICENSE.txt
 #
 
-from traits.api import Instance, on_trait_change
+import threading
+
+from traits.api import Any, Bool, Instance, Int, on_trait_change
 from enable.api import Component
+from kiva.constants import MODERN
+from kiva.fonttools import Font
 
-from .animated_context import AbstractAnimatedContext
+from .animated_context import AbstractAnimatedContext, union_rects
 
 class AnimatedComponent(Component):
     """ An Enable Component that displays an AnimatedContext
     
     The animated context will be stretched to fill the component.
+    
+    If the context's step() reports the regions which it changed, only the
+    union of those regions is invalidated and blitted.  Updates which arrive
+    while a paint is already pending don't request another paint: the
+    pending paint shows the latest frame and all of the accumulated damage.
     """
     
     animated_context = Instance(AbstractAnimatedContext)
     
+    #: whether to overlay the frame rate and step time, if the animated
+    #: context is collecting stats
+    show_stats = Bool(False)
+    
+    #: the number of updates which were folded into an already pending
+    #: paint; if this grows steadily the display can't keep up
+    coalesced_frames = Int
+    
+    #: whether a paint has been requested and has not started yet
+    _paint_pending = Bool(False)
+    
+    #: lock for the pending paint state, which is shared between the thread
+    #: updating the context and the UI thread
+    _paint_lock = Instance(threading.Lock, ())
+    
+    #: the rectangles of the context damaged since the last paint; None if
+    #: all of it must be repainted, or an empty list if the paint was not
+    #: requested by the context
+    _damage = Any([])
+    
     @on_trait_change('animated_context.updated')
-    def context_updated(self):
-        self.request_redraw()
+    def context_updated(self, updated):
+        if updated is not None and len(updated) == 0:
+            return
+        with self._paint_lock:
+            if updated is None:
+                self._damage = None
+            elif self._damage is not None:
+                self._damage = self._damage + list(updated)
+            pending = self._paint_pending
+            self._paint_pending = True
+        if updated is not None:
+            self.invalidate_draw([union_rects(updated)], self_relative=True)
+        if pending:
+            self.coalesced_frames += 1
+        else:
+            self.request_redraw()
     
     def _draw_mainlayer(self, gc, view_bounds=None, mode="normal"):
-        # acquire the source gc lock before blitting to prevent animation thread
+        with self._paint_lock:
+            damage = self._damage
+            self._damage = []
+            self._paint_pending = False
+        # hold the source gc before blitting to prevent animation thread
         # from writing into buffer as we draw
-        with self.animated_context.gc_lock:
-            source_gc = self.animated_context.gc
+        clip = self._damage_clip(damage)
+        with self.animated_context.front_buffer() as source_gc:
             with gc:
+                if clip is not None:
+                    gc.clip_to_rect(*clip)
                 gc.draw_image(source_gc, (0, 0, source_gc.width(),
                     source_gc.height()))
+        stats = self.animated_context.stats
+        if self.show_stats and stats is not None:
+            self._draw_stats(gc, stats)
+    
+    def _damage_clip(self, damage):
+        """ The rectangle to clip the blit to, or None to blit everything
+
+        Clipping is only safe when the window is repainting just the regions
+        which were invalidated, and they all lie within the damage: paints
+        for exposes, resizes and so on must redraw the whole component.
+        """
+        if not damage:
+            return None
+        region = getattr(self.window, '_update_region', None)
+        if not region:
+            # the window is repainting everything
+            return None
+        x, y, width, height = union_rects(region)
+        x -= self.x
+        y -= self.y
+        clip = union_rects(damage)
+        if (x < clip[0] or y < clip[1] or x + width > clip[0] + clip[2] or
+                y + height > clip[1] + clip[3]):
+            return None
+        return clip
+    
+    def _draw_stats(self, gc, stats):
+        text = '%.1f fps  step %.1f ms (max %.1f)  missed %d  coalesced %d' % (
+            stats.frame_rate, 1000*stats.last_step, 1000*stats.step_max,
+            stats.missed_frames, self.coalesced_frames)
+        with gc:
+            gc.set_font(Font(size=10, family=MODERN))
+            gc.set_fill_color((0.0, 0.0, 0.0, 0.5))
+            gc.rect(0, 0, self.width, 16)
+            gc.fill_path()
+            gc.set_fill_color((1.0, 1.0, 1.0, 1.0))
+            gc.show_text_at_point(text, 4, 4)
     
@@ -6,72 +6,415 @@
 # LICENSE.txt
 #
 
-import sys
-import time
 import logging
+import math
 import threading
+from contextlib import contextmanager
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
 
 from encore.events.api import BaseEventManager, get_event_manager, Heartbeat, \
     HeartbeatEvent
-from traits.api import HasTraits, Float, Instance, Event
+from traits.api import HasTraits, Any, Bool, Float, Instance, Event, \
+    Property, Range
 from kiva.image import GraphicsContext
 
+from .clock import AbstractClock, SystemClock, accurate_time
+from .governor import FrameRateGovernor, ResolutionGovernor
+from .scheduler import ScheduledHeartbeat
+from .stats import FrameStats
+
 logger = logging.getLogger(__name__)
 
-if sys.platform == 'win32':
-    accurate_time = time.clock
-else:
-    accurate_time = time.time
+
+def union_rects(rects):
+    """ The (x, y, width, height) bounding box of a sequence of rectangles """
+    x0 = min(rect[0] for rect in rects)
+    y0 = min(rect[1] for rect in rects)
+    x1 = max(rect[0]+rect[2] for rect in rects)
+    y1 = max(rect[1]+rect[3] for rect in rects)
+    return (x0, y0, x1-x0, y1-y0)
+
 
 class AbstractAnimatedContext(HasTraits):
     
     #: the event manager that we use
     event_manager = Instance(BaseEventManager)
     
-    #: the heartbeat for this animation.  Every animation has its own heartbeat.
+    #: the clock which the animation is timed by; with a clock which is not
+    #: real time, no heartbeat is used and the clock's owner calls
+    #: `listener` to render each frame
+    clock = Instance(AbstractClock)
+    
+    #: the heartbeat for this animation.  By default every animation has its
+    #: own heartbeat, and they all share the global HeartbeatScheduler's
+    #: thread.  The default heartbeat is suspended while the animation is
+    #: stopped.
     heartbeat = Instance(Heartbeat)
     
+    #: whether the heartbeat was created by the animation, and so may be
+    #: suspended when it stops
+    _owns_heartbeat = Bool(False)
+    
     #: the frame rate of the animation
     frame_rate = Float(30.)
     
     #: the GraphicsContext we are going to draw into
     gc = Instance(GraphicsContext)
     
-    #: an event which is fired whenever the gc is updated
+    #: a NumPy array viewing the gc's pixel buffer, for drawing without kiva;
+    #: see `_get_pixels`
+    pixels = Property
+    
+    #: an event which is fired whenever the gc is updated, with the value
+    #: returned by step(): either None if the whole gc may have changed, or
+    #: a list of damaged (x, y, width, height) rectangles in gc coordinates
     updated = Event
     
     #: lock for the gc - acquire this to prevent other threads from rendering
     #: into the gc while you are using it
     gc_lock = Instance(threading.RLock, ())
     
+    #: whether to keep the last completed frame in a separate front buffer,
+    #: so that displaying it never waits for step() to finish
+    double_buffered = Bool(False)
+    
+    #: the last completed frame, when double buffered
+    front_gc = Instance(GraphicsContext)
+    
+    #: lock for the front buffer - this is only held while swapping buffers
+    #: and while copying out of the front buffer
+    front_lock = Instance(threading.RLock, ())
+    
+    #: if non-zero, a producer thread steps frames ahead of the heartbeat
+    #: into a ring of this many buffers, and each heartbeat shows the next
+    #: ready frame; this smooths out occasional slow steps at the cost of up
+    #: to this many frames of latency.  The governor is not used when
+    #: pipelined.
+    pipeline_depth = Range(0, 3)
+    
+    #: an optional governor which adapts the frame rate to the step cost.
+    #: With a scale governor as well, the frame rate is only lowered once
+    #: the render scale is at its minimum.
+    governor = Instance(FrameRateGovernor)
+    
+    #: the fraction of the gc's resolution at which step() should render.
+    #: Contexts which support scaled rendering draw into `render_gc` rather
+    #: than `gc`, and it is upscaled into the gc after each step.
+    render_scale = Range(0.0, 1.0, 1.0)
+    
+    #: the gc which step() should draw into: the gc itself at full scale,
+    #: otherwise a smaller gc of the same pixel format.  It is new and blank
+    #: whenever the scale changes, so step() should draw the whole frame.
+    render_gc = Property
+    
+    #: an optional governor which adapts the render scale to the step cost
+    scale_governor = Instance(ResolutionGovernor)
+    
+    #: optional statistics about frame timing, updated on every frame
+    stats = Instance(FrameStats)
+    
+    #: the thread computing frames ahead, when pipelined
+    _producer = Instance(threading.Thread)
+    
+    #: whether the producer thread should keep going
+    _producing = Bool(False)
+    
+    #: queue of buffers which the producer may fill
+    _free_buffers = Any
+    
+    #: queue of (frame, gc, updated, step time) for frames ready to be shown
+    _ready_frames = Any
+    
+    #: the scaled gc last handed out as the render gc, if any
+    _render_gc = Instance(GraphicsContext)
+    
     def start(self):
-        self.start_time = accurate_time()
-        self.heartbeat.serve()
-        self.event_manager.connect(HeartbeatEvent, self.listener,
-            filter={'source': self.heartbeat})
+        self.start_time = self.clock.time()
+        if self.governor is not None:
+            self.governor.reset(self.frame_rate)
+        if self.scale_governor is not None:
+            self.scale_governor.reset(self.frame_rate, self.render_scale)
+        if self.stats is not None:
+            self.stats.restart()
+        if self.pipeline_depth:
+            self._start_pipeline()
+        if self.clock.real_time:
+            self.heartbeat.serve()
+            self.event_manager.connect(HeartbeatEvent, self.listener,
+                filter={'source': self.heartbeat})
         logging.debug('Started animation "%s"' % self)
     
     def stop(self):
         logging.debug('Stopping animation "%s"' % self)
-        self.event_manager.disconnect(HeartbeatEvent, self.listener)
+        if self.clock.real_time:
+            self.event_manager.disconnect(HeartbeatEvent, self.listener)
+            if self._owns_heartbeat:
+                self.heartbeat.suspend()
+        if self._producer is not None:
+            self._stop_pipeline()
     
     def step(self, frame_count):
+        """ Render the given frame into the gc
+
+        Return None if the whole gc may have changed, or a list of
+        (x, y, width, height) rectangles, in gc coordinates, bounding the
+        regions which changed.  An empty list means that nothing changed.
+        """
         raise NotImplementedError
     
     def listener(self, event):
+        if self.pipeline_depth and self._producer is not None:
+            self._show_next_frame(event)
+            return
+        governor = self.governor
+        if governor is None:
+            frame = event.frame
+        else:
+            now = self.clock.time()
+            frame = governor.frame_for(now-self.start_time, now-event.time)
+            if frame is None:
+                return
         try:
+            lock_start = accurate_time()
             with self.gc_lock:
-                updated = self.step(event.frame)
+                step_start = accurate_time()
+                updated = self._upscale(self.step(frame))
+                if self.double_buffered:
+                    self._swap_buffers(updated)
+            step_end = accurate_time()
+            self._update_scale(step_end-step_start)
+            if governor is not None and self.clock.real_time:
+                self._update_rate(governor, step_end-step_start)
+            if self.stats is not None:
+                self.stats.record_frame(event.time, event.interval,
+                    step_end-step_start, step_start-lock_start)
             self.updated = updated
         except Exception as exc:
             logger.exception(exc)
             self.stop()
             raise
     
+    @contextmanager
+    def front_buffer(self):
+        """ Hold the gc containing the latest completed frame for display
+
+        Use this in a with statement, eg.::
+
+            with context.front_buffer() as gc:
+                other_gc.draw_image(gc)
+
+        When double buffered this only holds the front buffer lock, so it
+        does not wait for a step in progress; otherwise it holds gc_lock.
+        """
+        if self.front_gc is not None and (self.double_buffered or
+                self.pipeline_depth):
+            with self.front_lock:
+                yield self.front_gc
+        else:
+            with self.gc_lock:
+                yield self.gc
+    
+    def _get_pixels(self):
+        """ A writable view of the gc's pixels, sharing its memory
+
+        The array has shape (height, width, channels), with channels in the
+        order given by the gc's pixel format (`gc.format()`, 'bgra32' by
+        default, so pixels[..., 2::-1] is RGB and pixels[..., 3] is alpha).
+        Rows run from the top of the image down, as in `gc.save()`, so row
+        `r` covers gc y coordinates from `height-r-1` to `height-r`.  The
+        strides are those of the underlying buffer: rows may be padded, so
+        use the array's `strides` rather than assuming a contiguous layout.
+
+        Writing to the array changes the gc immediately, so only write to it
+        inside step() or while holding `gc_lock`.  When double buffered the
+        gc is swapped after each step, so fetch the array again each frame
+        rather than keeping a reference to it.
+        """
+        return self.gc.bmp_array
+    
+    def _swap_buffers(self, damaged=None):
+        """ Make the frame just drawn the front buffer
+
+        The buffers are exchanged under a very short lock, then the new
+        frame's damaged regions are copied into the back buffer so that
+        step() always starts from the previous frame, as it would without
+        double buffering.
+        """
+        front = self.front_gc
+        if front is None:
+            self.front_gc = self._copy_gc()
+            return
+        with self.front_lock:
+            self.front_gc, self.gc = self.gc, front
+        source = self.front_gc.bmp_array
+        target = self.pixels
+        if damaged is None:
+            target[...] = source
+        else:
+            for rect in damaged:
+                region = self._array_region(rect)
+                target[region] = source[region]
+    
+    def _get_render_gc(self):
+        scale = self.render_scale
+        gc = self.gc
+        if scale == 1.0:
+            self._render_gc = None
+            return gc
+        size = (max(int(round(gc.width()*scale)), 1),
+            max(int(round(gc.height()*scale)), 1))
+        render_gc = self._render_gc
+        if render_gc is None or (render_gc.width(),
+                render_gc.height()) != size:
+            render_gc = self._render_gc = GraphicsContext(size,
+                pix_format=gc.format())
+        return render_gc
+    
+    def _upscale(self, updated):
+        """ Draw a scaled render gc into the gc after a step
+
+        Returns the damaged rectangles scaled to gc coordinates.
+        """
+        render_gc = self._render_gc
+        if render_gc is None:
+            return updated
+        gc = self.gc
+        with gc:
+            gc.draw_image(render_gc, (0, 0, gc.width(), gc.height()))
+        if updated is None:
+            return None
+        x_scale = gc.width()/float(render_gc.width())
+        y_scale = gc.height()/float(render_gc.height())
+        # grow the rectangles by a pixel to cover interpolation at the edges
+        return [(int(x*x_scale)-1, int(y*y_scale)-1,
+                int(math.ceil(width*x_scale))+2,
+                int(math.ceil(height*y_scale))+2)
+            for x, y, width, height in updated]
+    
+    def _update_scale(self, cost):
+        """ Let the scale governor adjust the render scale
+
+        Only frames shown in real time need to keep up with the wall clock,
+        so eg. exported frames are rendered at a fixed scale.
+        """
+        if self.scale_governor is not None and self.clock.real_time:
+            self.render_scale = self.scale_governor.update(cost)
+    
+    def _update_rate(self, governor, cost):
+        """ Let the governor adjust the heartbeat's frame rate
+
+        While the scale governor can still lower the resolution the frame
+        rate is held at the target; the scale governor only raises the
+        scale when a step at the larger scale fits the target rate.
+        """
+        scale_governor = self.scale_governor
+        if (scale_governor is None or
+                self.render_scale <= scale_governor.min_scale):
+            self.heartbeat.interval = governor.update(cost)
+        elif governor.effective_frame_rate < self.frame_rate:
+            governor.effective_frame_rate = self.frame_rate
+            self.heartbeat.interval = 1./self.frame_rate
+    
+    def _copy_gc(self):
+        """ A new gc holding a copy of the current frame """
+        return GraphicsContext(self.gc.bmp_array.copy(),
+            pix_format=self.gc.format())
+    
+    def _start_pipeline(self):
+        """ Create the ring of buffers and start the producer thread """
+        with self.gc_lock:
+            self.front_gc = self._copy_gc()
+            self._free_buffers = Queue()
+            for i in range(self.pipeline_depth):
+                self._free_buffers.put(self._copy_gc())
+        self._ready_frames = Queue()
+        self._producing = True
+        self._producer = threading.Thread(target=self._produce)
+        self._producer.daemon = True
+        self._producer.start()
+    
+    def _stop_pipeline(self):
+        """ Stop the producer thread """
+        producer = self._producer
+        self._producer = None
+        self._producing = False
+        self._free_buffers.put(None)
+        if producer is not threading.current_thread():
+            producer.join()
+    
+    def _produce(self):
+        """ Step consecutive frames into free buffers until stopped """
+        frame = 0
+        while self._producing:
+            buffer = self._free_buffers.get()
+            if buffer is None or not self._producing:
+                break
+            try:
+                with self.gc_lock:
+                    step_start = accurate_time()
+                    updated = self._upscale(self.step(frame))
+                    step = accurate_time() - step_start
+                    buffer.bmp_array[...] = self.pixels
+                self._update_scale(step)
+            except Exception as exc:
+                logger.exception(exc)
+                self._ready_frames.put(exc)
+                break
+            self._ready_frames.put((frame, buffer, updated, step))
+            frame += 1
+    
+    def _show_next_frame(self, event):
+        """ Make the next ready frame the front buffer
+
+        With a real time clock a heartbeat with no frame ready keeps showing
+        the current frame; otherwise this waits for the producer.
+        """
+        try:
+            if self.clock.real_time:
+                item = self._ready_frames.get_nowait()
+            else:
+                item = self._ready_frames.get()
+        except Empty:
+            return
+        if isinstance(item, Exception):
+            self.stop()
+            raise item
+        frame, buffer, updated, step = item
+        with self.front_lock:
+            self.front_gc, buffer = buffer, self.front_gc
+        self._free_buffers.put(buffer)
+        if self.stats is not None:
+            self.stats.record_frame(event.time, event.interval, step)
+        self.updated = updated
+    
+    def _array_region(self, rect):
+        """ The index into the gc's pixel array of a gc rectangle
+
+        Rows of the pixel array run from the top of the image down, while gc
+        coordinates have their origin at the bottom left.
+        """
+        x, y, width, height = [int(round(value)) for value in rect]
+        rows = self.gc.height()
+        top = max(rows - (y + height), 0)
+        bottom = max(rows - y, 0)
+        left = max(x, 0)
+        return slice(top, bottom), slice(left, max(x + width, 0))
+    
+    def _clock_default(self):
+        return SystemClock()
+    
     def _event_manager_default(self):
         return get_event_manager()
     
     def _heartbeat_default(self):
-        return Heartbeat(interval=1./self.frame_rate,
+        self._owns_heartbeat = True
+        return ScheduledHeartbeat(interval=1./self.frame_rate,
             event_manager=self.event_manager)
     
+    def _heartbeat_changed(self):
+        # a heartbeat supplied by the caller, rather than by the default
+        self._owns_heartbeat = False
+    
@@ -3,7 +3,7 @@
 from traits.api import Instance
 from chaco.api import ArrayPlotData
 
-from .transition import PlotDataTransition
+from .transition import PlotDataTransition, PlotDataGroupTransition
 from .transition_manager import TransitionManager
 from .package_globals import get_transition_manager
 
@@ -11,14 +11,38 @@ class AnimatedPlotData(ArrayPlotData):
     
     transition_manager = Instance(TransitionManager)
     
-    def set_animated(self, name, new_data, ease='linear', duration=1.0):
-        transition = PlotDataTransition(
-                ease = 'array_'+ease,
-                plot_data = self,
-                data_key = name,
-                duration = duration,
-                final = new_data,
-        )
+    def set_animated(self, name, new_data=None, ease='linear', duration=1.0):
+        """ Animate the transition of data arrays to new values
+
+        Parameters
+        ----------
+        name : str or dict
+            The name of the array to animate, or a dictionary mapping names
+            to new arrays.  When given a dictionary, all of the arrays are
+            eased together and the plot data is updated once per frame.
+        new_data : array
+            The new array to animate to, if `name` is a string.
+        ease : str
+            The name of the easing to use, without the 'array_' prefix.
+        duration : float
+            The length of the transition in seconds.
+
+        """
+        if isinstance(name, dict):
+            transition = PlotDataGroupTransition(
+                    ease = 'array_'+ease,
+                    plot_data = self,
+                    duration = duration,
+                    final = name,
+            )
+        else:
+            transition = PlotDataTransition(
+                    ease = 'array_'+ease,
+                    plot_data = self,
+                    data_key = name,
+                    duration = duration,
+                    final = new_data,
+            )
         self.transition_manager.connect(transition)
     
     def _transition_manager_default(self):
@@ -7,9 +7,20 @@
 #
 
 from .transition_manager import TransitionManager
-from .transition import AttributeTransition, ItemTransition, PlotDataTransition
+from .transition import AttributeTransition, ItemTransition, PlotDataTransition, \
+    StaggeredPlotDataTransition, PlotDataGroupTransition
+from .transition_pool import AttributeTransitionPool
+from .timeline import Timeline, Sequence, Parallel, Delay
 from .package_globals import get_transition_manager, set_transition_manager
 from .animated_context import AbstractAnimatedContext
+from .process_context import ProcessAnimatedContext
+from .tiling import TiledRenderer, Tile
+from .governor import FrameRateGovernor, ResolutionGovernor
+from .clock import AbstractClock, SystemClock, VirtualClock
+from .scheduler import HeartbeatScheduler, ScheduledHeartbeat, \
+    get_heartbeat_scheduler, set_heartbeat_scheduler
+from .stats import FrameStats
+from .export import FrameExporter, PNGWriter, RawVideoWriter
 from .animated_component import AnimatedComponent
 from .interactive_context import InteractiveContext
 from .interactive_component import InteractiveComponent
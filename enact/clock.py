@@ -0,0 +1,98 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import sys
+import time
+
+from encore.events.api import HeartbeatEvent
+from traits.api import HasTraits, Bool, Float, Int
+
+if hasattr(time, 'perf_counter'):
+    # high resolution and monotonic everywhere; time.clock is gone in 3.8
+    accurate_time = time.perf_counter
+elif sys.platform == 'win32':
+    accurate_time = time.clock
+else:
+    accurate_time = time.time
+
+
+class AbstractClock(HasTraits):
+    """ A source of time for transitions and animated contexts """
+
+    #: whether time passes on its own, with ticks coming from a Heartbeat
+    #: thread; if False, whoever owns the clock advances it and delivers
+    #: the ticks
+    real_time = Bool(True)
+
+    def time(self):
+        """ The current time in seconds """
+        raise NotImplementedError
+
+
+class SystemClock(AbstractClock):
+    """ Real time, from the most accurate system clock available """
+
+    def time(self):
+        return accurate_time()
+
+
+class VirtualClock(AbstractClock):
+    """ A clock which only moves when told to
+
+    A virtual clock lets animations be stepped deterministically and as fast
+    as the CPU allows, with no sleeping and no threads, which is useful for
+    tests, batch rendering and benchmarks.  Give the same clock to the
+    transition managers and animated contexts that should share it, then
+    call `tick` or `run` with their listeners::
+
+        clock = VirtualClock(interval=1/30.)
+        manager = TransitionManager(clock=clock)
+        context = Life(clock=clock)
+        context.start()
+        manager.connect(transition)
+        clock.run([manager.listener, context.listener], 300)
+
+    """
+
+    real_time = Bool(False)
+
+    #: the current time in seconds
+    current_time = Float
+
+    #: the number of ticks delivered so far
+    frame_count = Int
+
+    #: the default time in seconds between ticks
+    interval = Float(1/50.)
+
+    def time(self):
+        return self.current_time
+
+    def advance(self, dt):
+        """ Move the clock forward by `dt` seconds without ticking """
+        self.current_time += dt
+
+    def tick(self, listeners, interval=None):
+        """ Deliver a heartbeat at the current time, then advance
+
+        Each listener is called with a HeartbeatEvent whose source is this
+        clock, in the same way that a Heartbeat would call it.
+        """
+        if interval is None:
+            interval = self.interval
+        event = HeartbeatEvent(source=self, time=self.current_time,
+            frame=self.frame_count, interval=interval)
+        for listener in listeners:
+            listener(event)
+        self.frame_count += 1
+        self.current_time += interval
+
+    def run(self, listeners, frames, interval=None):
+        """ Deliver `frames` consecutive ticks """
+        for i in range(frames):
+            self.tick(listeners, interval)
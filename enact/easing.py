@@ -6,9 +6,13 @@
 # LICENSE.txt
 #
 
-from numpy import zeros_like
+from math import pi
 
-from traits.api import Trait, Callable
+from numpy import add, amax, asarray, cos, empty_like, floor, inexact, interp, \
+    issubdtype, linspace, multiply, ndim, result_type, rint, sin, subtract, \
+    where, zeros, zeros_like
+
+from traits.api import Trait, TraitMap, Callable
 
 def cts_easing(f):
     def easing(dt, initial, final):
@@ -17,29 +21,53 @@ def cts_easing(f):
 
 def int_easing(f):
     def easing(dt, initial, final):
-        return int(round(initial + (final-initial)*f(dt)))
+        value = rint(initial + (final-initial)*f(dt))
+        if ndim(value) == 0:
+            return int(value)
+        return value.astype(int)
     return easing
 
+def _eased_length(l_i, l_f, g, dt):
+    """ The length of a sequence partway between lengths l_i and l_f
+
+    The easing is clipped to [0, 1], so curves which overshoot, such as
+    back and elastic, never give a negative or an oversized length.
+    """
+    progress = min(max(g(dt), 0.0), 1.0)
+    return int(round(l_i + (l_f-l_i)*progress))
+
 def list_extend_easing(f):
     """ Extend a list with easing
     """
     def easing(dt, initial, final):
         l_i = len(initial)
         l_f = len(final)
-        l = int(round(l_i + (l_f-l_i)*f(dt)))
+        l = _eased_length(l_i, l_f, f, dt)
         if l_i < l_f:
             return final[:l]
         else:
             return initial[:l]
     return easing
 
-def cts_array_extend_easing(f, g):
+class ArrayExtendEasing(object):
     """ Extend a float array with easing length and values
+
+    Calling the easing computes a fresh array each time.  For repeated
+    evaluation against the same end points, `prepare` returns a
+    PreparedArrayEasing which does its work in preallocated buffers.
     """
-    def easing(dt, initial, final):
+    
+    def __init__(self, f, g):
+        #: the easing of the values
+        self.f = f
+        #: the easing of the length
+        self.g = g
+    
+    def __call__(self, dt, initial, final):
+        f = self.f
         l_i = len(initial)
         l_f = len(final)
-        l = int(round(l_i + (l_f-l_i)*g(dt)))
+        l = _eased_length(l_i, l_f, self.g, amax(dt))
         if l_i < l_f:
             full_initial = zeros_like(final)
             full_initial[:l_i] = initial
@@ -48,8 +76,68 @@ def cts_array_extend_easing(f, g):
             full_final = zeros_like(initial)
             full_final[:l_f] = final
             return (initial + (full_final-initial)*f(dt))[:l]
-            
-    return easing
+    
+    def prepare(self, initial, final):
+        return PreparedArrayEasing(self.f, self.g, initial, final)
+
+
+class PreparedArrayEasing(object):
+    """ An array easing between fixed end points, evaluated in place
+
+    The zero-padded initial array and the difference between the end points
+    are computed once, and each evaluation writes into one of two output
+    buffers using NumPy `out=` operations, so no full-size temporaries are
+    allocated per frame.  The buffers alternate so that the array returned
+    by one call is not overwritten until the call after next.
+    """
+    
+    def __init__(self, f, g, initial, final):
+        initial = asarray(initial)
+        final = asarray(final)
+        self.f = f
+        self.g = g
+        self.l_i = l_i = len(initial)
+        self.l_f = l_f = len(final)
+        longer = final if l_i < l_f else initial
+        dtype = result_type(initial, final)
+        if not issubdtype(dtype, inexact):
+            # integer and bool data need room for the values in between
+            dtype = result_type(dtype, float)
+        self.initial = zeros(longer.shape, dtype=dtype)
+        self.initial[:l_i] = initial
+        self.delta = zeros(longer.shape, dtype=dtype)
+        self.delta[:l_f] = final
+        subtract(self.delta, self.initial, out=self.delta)
+        self.buffers = [empty_like(self.initial), empty_like(self.initial)]
+    
+    def __call__(self, dt):
+        l_i = self.l_i
+        l = _eased_length(l_i, self.l_f, self.g, amax(dt))
+        out = self.buffers.pop(0)
+        self.buffers.append(out)
+        out = out[:l]
+        eased = self.f(dt)
+        if ndim(eased):
+            eased = eased[:l]
+        multiply(self.delta[:l], eased, out=out)
+        add(out, self.initial[:l], out=out)
+        return out
+
+
+def cts_array_extend_easing(f, g):
+    """ Extend a float array with easing length and values
+    """
+    return ArrayExtendEasing(f, g)
+
+def prepare_easing(ease, initial, final):
+    """ Return the easing prepared for fixed end points, if it supports it
+
+    Returns None for easings which have no `prepare` method.
+    """
+    prepare = getattr(ease, 'prepare', None)
+    if prepare is None:
+        return None
+    return prepare(initial, final)
 
 def reverse(f):
     def f_prime(t):
@@ -57,21 +145,136 @@ def reverse(f):
     return f_prime
  
 
-cts_linear = cts_easing(lambda t: t)
-cts_ease_out_quad = cts_easing(lambda t: t**2)
-cts_ease_in_quad = cts_easing(lambda t: 1.0-(1.0-t)**2)
+class TabulatedCurve(object):
+    """ An easing curve sampled once into a dense lookup table
+
+    Evaluation linearly interpolates in the table, so the cost is the same
+    for every curve however expensive the original function is.  Works on
+    scalars and on NumPy arrays of progress values.
+    """
+    
+    def __init__(self, f, samples=1025):
+        #: the sample points, evenly spaced on [0, 1]
+        self.t = linspace(0.0, 1.0, samples)
+        #: the curve values at the sample points
+        self.values = asarray([f(t) for t in self.t], dtype=float)
+    
+    def __call__(self, t):
+        return interp(t, self.t, self.values)
+
 
-int_linear = int_easing(lambda t: t)
-int_ease_out_quad = int_easing(lambda t: t**2)
-int_ease_in_quad = int_easing(lambda t: 1.0-(1.0-t)**2)
+def cubic_bezier(x1, y1, x2, y2, samples=1025):
+    """ A CSS-style cubic-bezier easing curve
+
+    The curve runs from (0, 0) to (1, 1) with control points (x1, y1) and
+    (x2, y2), where x1 and x2 must lie in [0, 1].  Rather than solving for
+    the bezier parameter on every evaluation, the curve is densely sampled
+    in the parameter and tabulated against t once.
+    """
+    s = linspace(0.0, 1.0, 4*samples)
+    r = 1.0 - s
+    xs = 3*r*r*s*x1 + 3*r*s*s*x2 + s**3
+    ys = 3*r*r*s*y1 + 3*r*s*s*y2 + s**3
+    return TabulatedCurve(lambda t: interp(t, xs, ys), samples)
 
-list_linear = list_extend_easing(lambda t: t)
-list_ease_out_quad = list_extend_easing(lambda t: t**2)
-list_ease_in_quad = list_extend_easing(lambda t: 1.0-(1.0-t)**2)
 
-array_linear = cts_array_extend_easing(lambda t: t, lambda t: t)
-array_ease_out_quad = cts_array_extend_easing(lambda t: t**2, lambda t: t**2)
-array_ease_in_quad = cts_array_extend_easing(lambda t: 1.0-(1.0-t)**2, lambda t: 1.0-(1.0-t)**2)
+def linear(t):
+    return t
+
+def quad(t):
+    return t**2
+
+def quad_reversed(t):
+    return 1.0-(1.0-t)**2
+
+# Vectorized easing curves
+#
+# These take a scalar or an array of progress values and return the same.
+# Unlike the quadratic curves above, the '_in' and '_out' suffixes follow
+# the usual (Penner) convention: '_in' curves start slowly, '_out' curves
+# finish slowly.
+
+def _result(value):
+    """ Return 0-d arrays as scalars, leave other arrays alone """
+    return value[()]
+
+def in_out(f):
+    """ Join an '_in' curve with its reverse, meeting at t = 0.5 """
+    def f_prime(t):
+        t = asarray(t, dtype=float)
+        return _result(where(t < 0.5, 0.5*f(2.0*t), 1.0 - 0.5*f(2.0-2.0*t)))
+    return f_prime
+
+def cubic_in(t):
+    return t**3
+
+def quart_in(t):
+    return t**4
+
+def sine_in(t):
+    return 1.0 - cos(0.5*pi*asarray(t, dtype=float))[()]
+
+def expo_in(t):
+    t = asarray(t, dtype=float)
+    return _result(where(t <= 0.0, 0.0, 2.0**(10.0*t-10.0)))
+
+def elastic_in(t):
+    t = asarray(t, dtype=float)
+    value = -2.0**(10.0*t-10.0)*sin((10.0*t-10.75)*(2*pi/3))
+    return _result(where(t <= 0.0, 0.0, where(t >= 1.0, 1.0, value)))
+
+def back_in(t, overshoot=1.70158):
+    return (overshoot+1.0)*t**3 - overshoot*t**2
+
+def bounce_out(t):
+    t = asarray(t, dtype=float)
+    n, d = 7.5625, 2.75
+    value = where(t < 1/d, n*t*t,
+        where(t < 2/d, n*(t-1.5/d)**2 + 0.75,
+        where(t < 2.5/d, n*(t-2.25/d)**2 + 0.9375,
+        n*(t-2.625/d)**2 + 0.984375)))
+    return _result(value)
+
+def steps(n):
+    """ A curve which jumps in `n` equal steps, at the end of each interval
+
+    For example, register_easing('steps_8', steps(8)).
+    """
+    def f(t):
+        t = asarray(t, dtype=float)
+        return _result(floor(t*n).clip(0, n)/n)
+    return f
+
+cubic_out = reverse(cubic_in)
+quart_out = reverse(quart_in)
+sine_out = reverse(sine_in)
+expo_out = reverse(expo_in)
+elastic_out = reverse(elastic_in)
+back_out = reverse(back_in)
+bounce_in = reverse(bounce_out)
+
+#: the underlying easing curves, mapping progress in [0, 1] to [0, 1]
+easing_curves = {
+    'linear': linear,
+    'ease_out': quad,
+    'ease_in': quad_reversed,
+}
+
+cts_linear = cts_easing(linear)
+cts_ease_out_quad = cts_easing(quad)
+cts_ease_in_quad = cts_easing(quad_reversed)
+
+int_linear = int_easing(linear)
+int_ease_out_quad = int_easing(quad)
+int_ease_in_quad = int_easing(quad_reversed)
+
+list_linear = list_extend_easing(linear)
+list_ease_out_quad = list_extend_easing(quad)
+list_ease_in_quad = list_extend_easing(quad_reversed)
+
+array_linear = cts_array_extend_easing(linear, linear)
+array_ease_out_quad = cts_array_extend_easing(quad, quad)
+array_ease_in_quad = cts_array_extend_easing(quad_reversed, quad_reversed)
 
 easing_functions = {
     'linear': cts_linear,
@@ -88,4 +291,31 @@ easing_functions = {
     'array_ease_out': array_ease_out_quad,
 }
 
-Easing = Trait('linear', easing_functions, Callable)
+def register_easing(name, f):
+    """ Register an easing curve under the given name
+
+    This adds the curve to `easing_curves` and its continuous, integer, list
+    and array easings to `easing_functions` as `name`, 'int_'+`name`,
+    'list_'+`name` and 'array_'+`name`, so that the Easing trait accepts them.
+    """
+    easing_curves[name] = f
+    easing_functions[name] = cts_easing(f)
+    easing_functions['int_'+name] = int_easing(f)
+    easing_functions['list_'+name] = list_extend_easing(f)
+    easing_functions['array_'+name] = cts_array_extend_easing(f, f)
+
+# standard CSS timing functions
+register_easing('css_ease', cubic_bezier(0.25, 0.1, 0.25, 1.0))
+register_easing('css_ease_in', cubic_bezier(0.42, 0.0, 1.0, 1.0))
+register_easing('css_ease_out', cubic_bezier(0.0, 0.0, 0.58, 1.0))
+register_easing('css_ease_in_out', cubic_bezier(0.42, 0.0, 0.58, 1.0))
+
+for _name, _f in [('cubic', cubic_in), ('quart', quart_in), ('sine', sine_in),
+        ('expo', expo_in), ('elastic', elastic_in), ('back', back_in),
+        ('bounce', bounce_in)]:
+    register_easing(_name+'_in', _f)
+    register_easing(_name+'_out', reverse(_f))
+    register_easing(_name+'_in_out', in_out(_f))
+del _name, _f
+
+Easing = Trait('linear', TraitMap(easing_functions), Callable)
@@ -0,0 +1,215 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import os
+import logging
+import threading
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+from traits.api import HasTraits, Any, Float, Instance, Int, Str
+
+from .animated_context import AbstractAnimatedContext
+from .clock import VirtualClock, accurate_time
+
+logger = logging.getLogger(__name__)
+
+#: the channel order of RGB(A) data for kiva pixel formats
+channel_orders = {
+    'rgb24': [0, 1, 2],
+    'bgr24': [2, 1, 0],
+    'rgba32': [0, 1, 2, 3],
+    'bgra32': [2, 1, 0, 3],
+    'argb32': [1, 2, 3, 0],
+    'abgr32': [3, 2, 1, 0],
+}
+
+
+class AbstractFrameWriter(HasTraits):
+    """ Encodes frames copied out of an animated context """
+
+    #: the number of writer threads that may call `write` concurrently
+    threads = Int(1)
+
+    def open(self):
+        """ Called before the first frame is written """
+        pass
+
+    def write(self, index, pixels, pix_format):
+        """ Encode a frame
+
+        Parameters
+        ----------
+        index : int
+            The number of the frame, starting from 0.
+        pixels : array
+            A (height, width, channels) uint8 array which the writer owns.
+        pix_format : str
+            The kiva pixel format of the array, eg. 'bgra32'.
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ Called after the last frame is written """
+        pass
+
+
+class PNGWriter(AbstractFrameWriter):
+    """ Writes each frame to a numbered PNG file, using several threads """
+
+    #: the directory to write into
+    directory = Str('.')
+
+    #: the file name pattern, formatted with the frame index
+    pattern = Str('frame_%05d.png')
+
+    threads = 4
+
+    def open(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def write(self, index, pixels, pix_format):
+        from PIL import Image
+        pixels = pixels[..., channel_orders[pix_format]]
+        mode = 'RGBA' if pixels.shape[-1] == 4 else 'RGB'
+        filename = os.path.join(self.directory, self.pattern % index)
+        Image.fromarray(pixels, mode).save(filename)
+
+
+class RawVideoWriter(AbstractFrameWriter):
+    """ Streams frames as raw RGB24 data to a file-like object
+
+    The stream is typically the stdin of an encoder, eg.::
+
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 512x512 -r 30 -i - out.mp4
+
+    Frames must arrive in order, so this writer uses a single thread.
+    """
+
+    #: the file-like object to write to
+    stream = Any
+
+    threads = 1
+
+    def write(self, index, pixels, pix_format):
+        pixels = pixels[..., channel_orders[pix_format][:3]]
+        self.stream.write(pixels.tobytes())
+
+    def close(self):
+        self.stream.flush()
+
+
+class FrameExporter(HasTraits):
+    """ Renders an animated context headlessly and encodes the frames
+
+    The context is driven from a VirtualClock, so frames are rendered as
+    fast as `step()` allows with no display or heartbeat thread.  Each frame
+    is copied out of the context's gc into a bounded queue, from which the
+    writer's threads encode them, so encoding overlaps with rendering; when
+    the writers fall behind, rendering waits for space in the queue.
+
+    Example
+    -------
+    ::
+
+        exporter = FrameExporter(context=Life(),
+            writer=PNGWriter(directory='life_frames'))
+        exporter.export(300)
+        throughput = exporter.frames_per_second
+
+    """
+
+    #: the context to render
+    context = Instance(AbstractAnimatedContext)
+
+    #: the writer which encodes the frames
+    writer = Instance(AbstractFrameWriter)
+
+    #: the clock driving the context; defaults to ticking at its frame rate
+    clock = Instance(VirtualClock)
+
+    #: the maximum number of rendered frames waiting to be encoded
+    queue_size = Int(8)
+
+    #: the number of frames encoded by the last export
+    frames_written = Int
+
+    #: the wall-clock time taken by the last export, in seconds
+    elapsed = Float
+
+    #: the throughput of the last export, in frames per second
+    frames_per_second = Float
+
+    def export(self, frames):
+        """ Render and encode `frames` frames """
+        context = self.context
+        writer = self.writer
+        old_clock = context.clock
+        context.clock = self.clock
+        frame_queue = Queue(self.queue_size)
+        errors = []
+        written = [0]
+        written_lock = threading.Lock()
+
+        def encode():
+            while True:
+                item = frame_queue.get()
+                if item is None:
+                    break
+                try:
+                    writer.write(*item)
+                    with written_lock:
+                        written[0] += 1
+                except Exception as exc:
+                    logger.exception(exc)
+                    errors.append(exc)
+
+        writer.open()
+        workers = [threading.Thread(target=encode)
+            for i in range(writer.threads)]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+
+        start = accurate_time()
+        started = False
+        try:
+            context.start()
+            started = True
+            pix_format = context.gc.format()
+            for i in range(frames):
+                if errors:
+                    break
+                self.clock.tick([context.listener])
+                with context.front_buffer() as gc:
+                    pixels = gc.bmp_array.copy()
+                frame_queue.put((i, pixels, pix_format))
+        finally:
+            if started:
+                context.stop()
+            # leave the context animating in real time again afterwards
+            context.clock = old_clock
+            for worker in workers:
+                frame_queue.put(None)
+            for worker in workers:
+                worker.join()
+            writer.close()
+
+        self.elapsed = accurate_time() - start
+        self.frames_written = written[0]
+        if self.elapsed > 0:
+            self.frames_per_second = self.frames_written/self.elapsed
+        if errors:
+            raise errors[0]
+
+    def _clock_default(self):
+        return VirtualClock(interval=1./self.context.frame_rate)
@@ -0,0 +1,157 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+from traits.api import HasTraits, Float, Int, Range
+
+
+class FrameRateGovernor(HasTraits):
+    """ Adapts an animation's frame rate to the cost of rendering frames
+
+    The governor keeps a smoothed estimate of the time taken by each step.
+    When that exceeds the budgeted fraction of the frame interval it lowers
+    the effective frame rate so that steps fit, and when there is headroom
+    it raises the rate gradually back towards the target.
+
+    Frame numbers are derived from elapsed time at the target frame rate,
+    so animations keep their speed when the effective rate drops; frames
+    which are passed over as a result, and heartbeats which arrive too late
+    to be worth rendering, are counted as skipped.
+    """
+
+    #: the target frame rate
+    frame_rate = Float(30.)
+
+    #: the lowest frame rate the governor will drop to
+    min_frame_rate = Float(1.)
+
+    #: the fraction of each frame interval which step() may take
+    budget = Range(0.05, 1.0, 0.8)
+
+    #: the weight of the newest measurement in the smoothed step cost
+    smoothing = Range(0.0, 1.0, 0.25)
+
+    #: the factor by which the frame rate recovers per frame with headroom
+    recovery = Float(1.05)
+
+    #: the frame rate currently being used
+    effective_frame_rate = Float(30.)
+
+    #: the smoothed time in seconds taken by each step
+    step_cost = Float
+
+    #: the number of frames which have been skipped
+    skipped_frames = Int
+
+    #: the most recent frame number handed out
+    last_frame = Int(-1)
+
+    def reset(self, frame_rate):
+        """ Start governing a fresh run at the given target frame rate """
+        self.frame_rate = frame_rate
+        self.effective_frame_rate = frame_rate
+        self.step_cost = 0.0
+        self.skipped_frames = 0
+        self.last_frame = -1
+
+    def frame_for(self, elapsed, lateness):
+        """ The frame to render for a heartbeat, or None to skip it
+
+        Parameters
+        ----------
+        elapsed : float
+            The time in seconds since the animation started.
+        lateness : float
+            How long ago in seconds the heartbeat was emitted.
+
+        """
+        if lateness > 1./self.effective_frame_rate:
+            # we are behind; this heartbeat is stale
+            self.skipped_frames += 1
+            return None
+        frame = max(int(elapsed*self.frame_rate), self.last_frame+1)
+        self.skipped_frames += frame - self.last_frame - 1
+        self.last_frame = frame
+        return frame
+
+    def update(self, cost):
+        """ Record the cost of a step and return the new frame interval """
+        if self.step_cost:
+            cost = self.smoothing*cost + (1.0-self.smoothing)*self.step_cost
+        self.step_cost = cost
+        rate = self.effective_frame_rate
+        if cost > 0.0:
+            affordable = self.budget/cost
+            if affordable < rate:
+                rate = affordable
+            elif affordable > rate*self.recovery:
+                rate *= self.recovery
+        rate = min(max(rate, self.min_frame_rate), self.frame_rate)
+        self.effective_frame_rate = rate
+        return 1./rate
+
+
+class ResolutionGovernor(HasTraits):
+    """ Adapts an animation's render resolution to the cost of rendering
+
+    The governor keeps a smoothed estimate of the time taken by each step.
+    When that exceeds the budgeted fraction of the frame interval it lowers
+    the render scale in proportion, assuming that the cost is proportional
+    to the number of pixels rendered.  When the cost at the next larger
+    scale would fit within the budget it raises the scale a step at a time,
+    back to full resolution.  Scales are multiples of `scale_step`, so the
+    render buffer is not reallocated on every frame.
+    """
+
+    #: the target frame rate
+    frame_rate = Float(30.)
+
+    #: the fraction of each frame interval which step() may take
+    budget = Range(0.05, 1.0, 0.8)
+
+    #: the smallest scale the governor will drop to
+    min_scale = Range(0.05, 1.0, 0.25)
+
+    #: the granularity of the scale
+    scale_step = Range(0.01, 0.5, 0.125)
+
+    #: the weight of the newest measurement in the smoothed step cost
+    smoothing = Range(0.0, 1.0, 0.25)
+
+    #: the scale currently being rendered at
+    render_scale = Range(0.0, 1.0, 1.0)
+
+    #: the smoothed time in seconds taken by each step at the current scale
+    step_cost = Float
+
+    def reset(self, frame_rate, render_scale=1.0):
+        """ Start governing a fresh run at the given target frame rate """
+        self.frame_rate = frame_rate
+        self.render_scale = render_scale
+        self.step_cost = 0.0
+
+    def update(self, cost):
+        """ Record the cost of a step and return the new render scale """
+        if self.step_cost:
+            cost = self.smoothing*cost + (1.0-self.smoothing)*self.step_cost
+        self.step_cost = cost
+        target = self.budget/self.frame_rate
+        scale = self.render_scale
+        if cost > target:
+            affordable = scale*(target/cost)**0.5
+            steps = int(affordable/self.scale_step)
+            scale = min(steps*self.scale_step, scale - self.scale_step)
+            scale = max(scale, self.min_scale)
+        elif scale < 1.0:
+            larger = min(scale + self.scale_step, 1.0)
+            if cost*(larger/scale)**2 < target:
+                scale = larger
+        if scale != self.render_scale:
+            # costs at the old scale don't predict costs at the new one
+            self.render_scale = scale
+            self.step_cost = 0.0
+        return scale
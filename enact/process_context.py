@@ -0,0 +1,220 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import logging
+import multiprocessing
+import traceback
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+import numpy
+
+from traits.api import Any, Dict, Float, Int, List
+from kiva.image import GraphicsContext
+
+from .animated_context import AbstractAnimatedContext
+from .clock import accurate_time
+
+logger = logging.getLogger(__name__)
+
+
+def _render_worker(renderer, buffers, shape, tasks, results):
+    """ Render frames into shared buffers until told to stop """
+    views = [numpy.frombuffer(buffer, dtype='uint8').reshape(shape)
+        for buffer in buffers]
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        frame, slot = task
+        try:
+            renderer(frame, views[slot])
+            results.put((frame, slot, None))
+        except Exception:
+            results.put((frame, slot, traceback.format_exc()))
+
+
+class ProcessAnimatedContext(AbstractAnimatedContext):
+    """ An animated context whose frames are computed in worker processes
+
+    CPU-bound frame computation in step() holds the GIL and competes with
+    the UI.  This context instead hands each frame number to a pool of
+    worker processes, which call the `renderer` with the frame number and a
+    (height, width, channels) uint8 array in shared memory, laid out in the
+    gc's pixel format.  The renderer must be picklable (eg. a module level
+    function or an instance of a module level class) and should draw the
+    whole frame.
+
+    Frames are computed ahead in `workers` + 2 shared slots, each wrapped
+    in a GraphicsContext, so with several workers consecutive frames are
+    computed concurrently.  step() makes the slot holding the finished frame
+    the context's gc, rather than copying it, and frames are always shown
+    in order.  With a real time clock a heartbeat never waits for the
+    workers: it shows the newest finished frame which is due, or keeps
+    showing the current one.  With other clocks step() waits for exactly
+    the requested frame, for up to `timeout` seconds.
+
+    Example
+    -------
+    ::
+
+        def render(frame, pixels):
+            pixels[...] = compute_image(frame)
+
+        context = ProcessAnimatedContext(renderer=render, workers=4)
+
+    """
+
+    #: a picklable callable renderer(frame, pixels) drawing into pixels
+    renderer = Any
+
+    #: the number of worker processes
+    workers = Int(2)
+
+    #: the longest time in seconds to wait for a frame before giving up
+    timeout = Float(10.0)
+
+    #: the shared memory frame slots
+    _buffers = List
+
+    #: a GraphicsContext over each slot
+    _gcs = List
+
+    #: the worker processes
+    _processes = List
+
+    #: the queue of (frame, slot) tasks for the workers
+    _tasks = Any
+
+    #: the queue of (frame, slot, error) results from the workers
+    _results = Any
+
+    #: the free slots
+    _free = List
+
+    #: slots of the frames being computed, keyed by frame
+    _in_flight = Dict
+
+    #: slots of the frames which are ready to be shown, keyed by frame
+    _ready = Dict
+
+    #: the slot which is currently the gc, if any
+    _shown = Any
+
+    #: the next frame to hand to a worker
+    _next_frame = Int
+
+    def start(self):
+        pixels = self.pixels
+        shape = pixels.shape
+        pix_format = self.gc.format()
+        slots = self.workers + 2
+        self._buffers = [multiprocessing.RawArray('B', pixels.size)
+            for i in range(slots)]
+        self._gcs = [GraphicsContext(numpy.frombuffer(buffer,
+                dtype='uint8').reshape(shape), pix_format=pix_format)
+            for buffer in self._buffers]
+        self._tasks = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._free = list(range(slots))
+        self._in_flight = {}
+        self._ready = {}
+        self._shown = None
+        self._next_frame = 0
+        self._processes = [multiprocessing.Process(target=_render_worker,
+                args=(self.renderer, self._buffers, shape, self._tasks,
+                    self._results))
+            for i in range(self.workers)]
+        for process in self._processes:
+            process.daemon = True
+            process.start()
+        self._submit()
+        super(ProcessAnimatedContext, self).start()
+
+    def stop(self):
+        super(ProcessAnimatedContext, self).stop()
+        for process in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        # the gc keeps its own slot's memory alive
+        self._buffers = []
+        self._gcs = []
+
+    def step(self, frame_count):
+        if frame_count >= self._next_frame:
+            # the governor skipped past everything computed so far
+            self._next_frame = frame_count
+            self._submit()
+        if self.clock.real_time:
+            self._collect()
+            due = [frame for frame in self._ready if frame <= frame_count]
+            if not due:
+                # keep showing the current frame
+                return []
+            frame_count = max(due)
+        else:
+            deadline = accurate_time() + self.timeout
+            while frame_count not in self._ready:
+                if accurate_time() > deadline:
+                    raise RuntimeError('Timed out waiting for frame %d' %
+                        frame_count)
+                self._collect(0.1)
+                # reuse the slots of skipped frames right away
+                self._release_before(frame_count)
+        self._release_before(frame_count)
+        slot = self._ready.pop(frame_count)
+        self.gc = self._gcs[slot]
+        if self._shown is not None:
+            self._free.append(self._shown)
+        self._shown = slot
+        self._submit()
+
+    def _collect(self, timeout=None):
+        """ Move finished frames to the ready slots
+
+        If `timeout` is given, wait up to that long for the first result.
+        Raises RuntimeError if rendering failed or a worker has died.
+        """
+        block = timeout is not None
+        while True:
+            try:
+                frame, slot, error = self._results.get(block, timeout)
+            except Empty:
+                break
+            block = False
+            if error is not None:
+                raise RuntimeError('Rendering frame %d failed:\n%s' %
+                    (frame, error))
+            del self._in_flight[frame]
+            self._ready[frame] = slot
+        for process in self._processes:
+            if not process.is_alive():
+                raise RuntimeError('Rendering worker process %d died' %
+                    process.pid)
+
+    def _release_before(self, frame_count):
+        """ Free the slots of ready frames earlier than `frame_count` """
+        for frame in list(self._ready):
+            if frame < frame_count:
+                self._free.append(self._ready.pop(frame))
+        self._submit()
+
+    def _submit(self):
+        """ Hand the following frames to the workers while slots are free """
+        while self._free:
+            slot = self._free.pop()
+            frame = self._next_frame
+            self._in_flight[frame] = slot
+            self._tasks.put((frame, slot))
+            self._next_frame += 1
@@ -0,0 +1,207 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import logging
+import math
+import threading
+
+from encore.events.api import Heartbeat, HeartbeatEvent
+
+from .clock import accurate_time
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatScheduler(object):
+    """ Drives many heartbeats with different intervals from one thread
+
+    Each ScheduledHeartbeat ticks on a grid of times `epoch + k*interval`
+    from an epoch shared by all of the scheduler's heartbeats, so heartbeats
+    whose intervals are multiples of one another (eg. 60, 30 and 15 fps)
+    fall due at the same moments.  Every heartbeat which is due within
+    `tolerance` seconds of a wakeup is emitted in that wakeup, and the
+    thread sleeps until the next heartbeat is due.  Suspended, paused and
+    waiting heartbeats cost nothing until their state changes.
+
+    All listeners run on the scheduler's thread, one after another, so a
+    slow listener delays the other heartbeats in the same wakeup.
+    """
+
+    def __init__(self, tolerance=0.002):
+        #: heartbeats due within this many seconds are emitted together
+        self.tolerance = tolerance
+        #: the time from which all of the heartbeats' ticks are aligned
+        self.epoch = accurate_time()
+        self._heartbeats = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, heartbeat):
+        """ Start driving a heartbeat """
+        with self._lock:
+            if heartbeat not in self._heartbeats:
+                self._heartbeats.append(heartbeat)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run)
+                self._thread.daemon = True
+                self._thread.start()
+        self.wake()
+
+    def remove(self, heartbeat):
+        """ Stop driving a heartbeat """
+        with self._lock:
+            if heartbeat in self._heartbeats:
+                self._heartbeats.remove(heartbeat)
+        self.wake()
+
+    def wake(self):
+        """ Make the thread re-examine its heartbeats """
+        self._wake.set()
+
+    def next_tick(self, interval, after):
+        """ The first tick of the given interval's grid later than `after` """
+        ticks = math.floor((after - self.epoch)/interval) + 1
+        return self.epoch + ticks*interval
+
+    def run(self):
+        while True:
+            self._wake.clear()
+            with self._lock:
+                heartbeats = list(self._heartbeats)
+                if not heartbeats:
+                    self._thread = None
+                    return
+            now = accurate_time()
+            next_due = None
+            for heartbeat in heartbeats:
+                state = heartbeat.state
+                if state == 'stopping':
+                    self.remove(heartbeat)
+                    heartbeat._stopped()
+                    continue
+                if state != 'running':
+                    continue
+                if heartbeat.due <= now + self.tolerance:
+                    self._emit(heartbeat)
+                if next_due is None or heartbeat.due < next_due:
+                    next_due = heartbeat.due
+            if next_due is None:
+                self._wake.wait()
+            else:
+                wait = next_due - accurate_time()
+                if wait > 0:
+                    self._wake.wait(wait)
+
+    def _emit(self, heartbeat):
+        t = accurate_time()
+        try:
+            heartbeat.event_manager.emit(HeartbeatEvent(source=heartbeat,
+                time=t, frame=heartbeat.frame_count,
+                interval=heartbeat.interval))
+        except Exception as exc:
+            # keep the other heartbeats going
+            logger.exception(exc)
+        heartbeat.frame_count += 1
+        # the next tick on the grid, at least half an interval away in case
+        # this one was emitted early or late
+        interval = heartbeat.interval
+        heartbeat.due = self.next_tick(interval, t + 0.5*interval)
+
+
+class ScheduledHeartbeat(Heartbeat):
+    """ A Heartbeat driven by a shared HeartbeatScheduler
+
+    It emits HeartbeatEvents with itself as the source, but has no thread
+    of its own.  As well as a Heartbeat's 'waiting', 'running', 'paused',
+    'stopping' and 'stopped' states it can be 'suspended' with `suspend`,
+    which unlike pausing costs the scheduler nothing until `resume` or
+    `serve` is called.  The first heartbeat after serving or resuming is
+    emitted immediately; later ones are aligned with the scheduler's other
+    heartbeats.
+    """
+
+    def __init__(self, interval=1/50., event_manager=None, scheduler=None):
+        self._state = 'waiting'
+        self._done = threading.Event()
+        #: the scheduler which drives this heartbeat
+        self.scheduler = (scheduler if scheduler is not None
+            else get_heartbeat_scheduler())
+        #: the time at which the next heartbeat is due
+        self.due = 0.0
+        super(ScheduledHeartbeat, self).__init__(interval=interval,
+            event_manager=event_manager)
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        if value == 'running' and self._state != 'running':
+            self._schedule_now()
+        self._state = value
+        if value != 'waiting':
+            self.scheduler.wake()
+
+    def suspend(self):
+        """ Stop emitting heartbeats until resumed """
+        if self._state == 'running':
+            self.state = 'suspended'
+
+    def resume(self):
+        """ Resume emitting heartbeats after a suspend """
+        if self._state == 'suspended':
+            self.state = 'running'
+
+    def serve(self):
+        """ Start emitting heartbeats from the scheduler's thread """
+        self._done.clear()
+        self.state = 'running'
+        self.scheduler.add(self)
+
+    def run(self):
+        """ Start emitting heartbeats and block until stopped """
+        self.serve()
+        self._done.wait()
+
+    def _schedule_now(self):
+        """ Make the next heartbeat due immediately
+
+        The one after it then falls on the scheduler's grid, at least half
+        an interval later.
+        """
+        self.due = accurate_time()
+
+    def _stopped(self):
+        self._state = 'stopped'
+        self._done.set()
+
+
+_heartbeat_scheduler = None
+
+def get_heartbeat_scheduler():
+    """ Get the global heartbeat scheduler. """
+    global _heartbeat_scheduler
+    if _heartbeat_scheduler is None:
+        _heartbeat_scheduler = HeartbeatScheduler()
+    return _heartbeat_scheduler
+
+def set_heartbeat_scheduler(scheduler):
+    """ Set the global heartbeat scheduler.
+
+    Raises
+    ------
+    ValueError - If a heartbeat scheduler has already been set, since
+        heartbeats may already be using it.
+
+    """
+    global _heartbeat_scheduler
+    if _heartbeat_scheduler is not None:
+        raise ValueError('Heartbeat scheduler has already been set.')
+    _heartbeat_scheduler = scheduler
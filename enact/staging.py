@@ -0,0 +1,60 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import logging
+import threading
+
+from traits.trait_notifiers import ui_dispatch
+
+logger = logging.getLogger(__name__)
+
+
+class StagingBuffer(object):
+    """ Double-buffered writes which are applied on the UI thread
+
+    The animation thread publishes each frame's writes as a dictionary of
+    key: (function, args) pairs.  These are merged into the back buffer,
+    replacing any earlier write with the same key which has not yet been
+    applied, and a single UI-thread callback is scheduled if one is not
+    already pending.  The callback swaps the buffers under a short lock and
+    applies the latest write for each key, so intermediate values which
+    were superseded before the UI caught up are dropped.
+    """
+
+    def __init__(self):
+        self._back = {}
+        self._lock = threading.Lock()
+        self._pending = False
+
+    def publish(self, writes):
+        """ Stage a frame's writes and make sure that they will be applied """
+        with self._lock:
+            self._back.update(writes)
+            if self._pending:
+                return
+            self._pending = True
+        try:
+            ui_dispatch(self.apply)
+        except Exception as exc:
+            # eg. no UI handler registered; keep the writes staged so that
+            # the next publish tries again
+            with self._lock:
+                self._pending = False
+            logger.exception(exc)
+
+    def apply(self):
+        """ Apply the most recently staged writes; call on the UI thread """
+        with self._lock:
+            front = self._back
+            self._back = {}
+            self._pending = False
+        for function, args in front.values():
+            try:
+                function(*args)
+            except Exception as exc:
+                logger.exception(exc)
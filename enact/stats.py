@@ -0,0 +1,171 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+from bisect import bisect_left
+
+#: default upper edges, in seconds, of the step duration histogram bins; the
+#: last bin catches everything longer
+STEP_BIN_EDGES = (0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066, 0.133,
+    0.25, 0.5)
+
+
+class FrameStats(object):
+    """ Cheap running statistics about animation frames
+
+    A FrameStats object is updated by the thread running the animation (an
+    AbstractAnimatedContext or TransitionManager listener) and may be read
+    from any other thread.  Updating only does a little arithmetic on plain
+    attributes, so instrumentation stays cheap enough to leave enabled.
+
+    All times are in seconds.  Jitter is the difference between the time a
+    heartbeat was emitted and the time it was scheduled for, ie. the previous
+    heartbeat's time plus the interval.  A heartbeat which arrives more than
+    one and a half intervals after the previous one counts the frames in
+    between as missed.  Call `restart` when frames stop on purpose, eg. when
+    an animation is stopped or paused, so that the gap is not counted.
+    """
+
+    def __init__(self, bin_edges=STEP_BIN_EDGES, smoothing=0.1):
+        #: upper edges of the step duration histogram bins
+        self.bin_edges = tuple(bin_edges)
+        #: weight of the newest frame interval in the smoothed frame rate
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        """ Clear all of the statistics """
+        #: the number of frames recorded
+        self.frames = 0
+        #: counts of step durations in each histogram bin
+        self.step_histogram = [0]*(len(self.bin_edges)+1)
+        #: total, maximum and most recent step durations
+        self.step_total = 0.0
+        self.step_max = 0.0
+        self.last_step = 0.0
+        #: total absolute, maximum absolute and most recent jitter
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+        self.last_jitter = 0.0
+        #: the number of frames missed
+        self.missed_frames = 0
+        #: total and maximum time spent waiting for locks
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+        #: smoothed time between frames
+        self.frame_interval = 0.0
+        #: [calls, total time] spent stepping each running transition, keyed
+        #: by transition key
+        self.easing_cost = {}
+        #: [calls, total time] spent stepping transitions of each class
+        self.easing_cost_by_class = {}
+        self._jitter_count = 0
+        self.restart()
+
+    def restart(self):
+        """ Forget the previous frame, keeping the statistics
+
+        The next frame recorded is not compared with the frames before it.
+        """
+        self._last_time = None
+        self._last_interval = None
+
+    def record_frame(self, time, interval, step, lock_wait=0.0):
+        """ Record a frame
+
+        Parameters
+        ----------
+        time : float
+            The time the heartbeat for the frame was emitted.
+        interval : float
+            The heartbeat's nominal interval.
+        step : float
+            The time taken to compute the frame.
+        lock_wait : float
+            The time spent waiting to acquire locks for the frame.
+
+        """
+        self.frames += 1
+        self.step_histogram[bisect_left(self.bin_edges, step)] += 1
+        self.step_total += step
+        self.step_max = max(self.step_max, step)
+        self.last_step = step
+        self.lock_wait_total += lock_wait
+        self.lock_wait_max = max(self.lock_wait_max, lock_wait)
+
+        last_time = self._last_time
+        if last_time is not None:
+            last_interval = self._last_interval
+            jitter = time - (last_time + last_interval)
+            self.last_jitter = jitter
+            self._jitter_count += 1
+            self.jitter_total += abs(jitter)
+            self.jitter_max = max(self.jitter_max, abs(jitter))
+            elapsed = time - last_time
+            if last_interval > 0 and elapsed > 1.5*last_interval:
+                self.missed_frames += int(round(elapsed/last_interval)) - 1
+            if self.frame_interval:
+                self.frame_interval += self.smoothing*(elapsed -
+                    self.frame_interval)
+            else:
+                self.frame_interval = elapsed
+        self._last_time = time
+        self._last_interval = interval
+
+    def record_easing(self, key, transition_class, cost):
+        """ Record the time taken to step a transition """
+        entry = self.easing_cost.get(key)
+        if entry is None:
+            entry = self.easing_cost[key] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += cost
+        entry = self.easing_cost_by_class.get(transition_class)
+        if entry is None:
+            entry = self.easing_cost_by_class[transition_class] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += cost
+
+    def forget(self, key):
+        """ Drop the per-transition cost for a transition which has ended """
+        self.easing_cost.pop(key, None)
+
+    @property
+    def frame_rate(self):
+        """ The smoothed rate at which frames are being produced """
+        if self.frame_interval > 0:
+            return 1.0/self.frame_interval
+        return 0.0
+
+    @property
+    def mean_step(self):
+        if self.frames:
+            return self.step_total/self.frames
+        return 0.0
+
+    @property
+    def mean_jitter(self):
+        if self._jitter_count:
+            return self.jitter_total/self._jitter_count
+        return 0.0
+
+    def summary(self):
+        """ A snapshot of the statistics as a dictionary """
+        return {
+            'frames': self.frames,
+            'frame_rate': self.frame_rate,
+            'step_mean': self.mean_step,
+            'step_max': self.step_max,
+            'step_histogram': list(zip(self.bin_edges + (None,),
+                self.step_histogram)),
+            'jitter_mean': self.mean_jitter,
+            'jitter_max': self.jitter_max,
+            'missed_frames': self.missed_frames,
+            'lock_wait_total': self.lock_wait_total,
+            'lock_wait_max': self.lock_wait_max,
+            'easing_cost_by_class': dict((name, tuple(entry))
+                for name, entry in self.easing_cost_by_class.items()),
+        }
@@ -0,0 +1,158 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import os
+from collections import namedtuple
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+from traits.api import HasTraits, Any, Dict, Float, Int, Tuple
+
+from .clock import accurate_time
+
+try:
+    from time import thread_time
+except ImportError:
+    # before Python 3.7, fall back to the process' CPU time for whole renders
+    thread_time = None
+
+#: a tile of a frame.  `index` is a (rows, columns) pair of slices selecting
+#: the tile, `halo_index` selects the tile grown by the halo on each side
+#: (clipped at the edges of the frame), and `inner` selects the tile within
+#: an array the shape of the halo region
+Tile = namedtuple('Tile', ['index', 'halo_index', 'inner'])
+
+
+class TiledRenderer(HasTraits):
+    """ Renders a frame tile by tile on a pool of threads
+
+    This suits contexts where each pixel is computed independently from a
+    neighbourhood of source data by NumPy or Cython code which releases the
+    GIL.  The render function is called once per tile with a Tile, and
+    should index its source and target arrays with it, which gives views
+    rather than copies, eg. for a 3x3 neighbourhood with a halo of 1::
+
+        def blur(tile):
+            source = image[tile.halo_index]
+            result = uniform_filter(source, 3)
+            pixels[tile.index + (0,)] = result[tile.inner]
+
+        renderer = TiledRenderer(halo=1)
+        renderer.render(pixels.shape[:2], blur)
+
+    Tiles must only write to their own part of the target, and must not
+    write to the source arrays.  After each render, `speedup` reports the
+    CPU time spent in tiles over the elapsed time, and `efficiency` reports
+    that as a fraction of the number of threads.  Time spent waiting for the
+    GIL is not CPU time, so tiles which serialize on the GIL show no
+    speedup.
+    """
+
+    #: the (height, width) of the tiles in pixels; wide tiles keep rows
+    #: contiguous in memory
+    tile_shape = Tuple(Int(64), Int(1024))
+
+    #: the number of pixels of neighbouring data given to each tile
+    halo = Int(0)
+
+    #: the number of threads in the pool
+    threads = Int
+
+    #: the elapsed time of the last render, in seconds
+    wall_time = Float
+
+    #: the CPU time spent in tiles during the last render, in seconds
+    busy_time = Float
+
+    #: how many times faster the last render was than rendering serially
+    speedup = Float
+
+    #: the speedup as a fraction of the number of threads
+    efficiency = Float
+
+    #: the thread pool, created when first used
+    _pool = Any
+
+    #: the tiles for each frame shape
+    _tiles = Dict
+
+    def tiles(self, shape):
+        """ The tiles covering a frame of the given (height, width) """
+        shape = tuple(shape[:2])
+        tiles = self._tiles.get(shape)
+        if tiles is None:
+            tiles = self._tiles[shape] = self._make_tiles(shape)
+        return tiles
+
+    def render(self, shape, function):
+        """ Call `function` for every tile of a (height, width) frame
+
+        Returns once all of the tiles are done.  An exception raised by
+        `function` is re-raised here.
+        """
+        def timed(tile):
+            start = thread_time()
+            function(tile)
+            return thread_time() - start
+
+        if self._pool is None:
+            self._pool = ThreadPool(self.threads)
+        start = accurate_time()
+        if thread_time is not None:
+            busy = sum(self._pool.map(timed, self.tiles(shape)))
+        else:
+            cpu_start = sum(os.times()[:2])
+            self._pool.map(function, self.tiles(shape))
+            busy = sum(os.times()[:2]) - cpu_start
+        wall = accurate_time() - start
+        self.wall_time = wall
+        self.busy_time = busy
+        if wall > 0:
+            self.speedup = busy/wall
+            self.efficiency = self.speedup/self.threads
+
+    def close(self):
+        """ Shut down the thread pool """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _make_tiles(self, shape):
+        height, width = shape
+        tile_height, tile_width = self.tile_shape
+        halo = self.halo
+        tiles = []
+        for top in range(0, height, tile_height):
+            bottom = min(top + tile_height, height)
+            halo_top = max(top - halo, 0)
+            halo_bottom = min(bottom + halo, height)
+            for left in range(0, width, tile_width):
+                right = min(left + tile_width, width)
+                halo_left = max(left - halo, 0)
+                halo_right = min(right + halo, width)
+                tiles.append(Tile(
+                    (slice(top, bottom), slice(left, right)),
+                    (slice(halo_top, halo_bottom),
+                        slice(halo_left, halo_right)),
+                    (slice(top - halo_top, bottom - halo_top),
+                        slice(left - halo_left, right - halo_left)),
+                ))
+        return tiles
+
+    def _threads_default(self):
+        return cpu_count()
+
+    def _threads_changed(self):
+        self.close()
+
+    def _tile_shape_changed(self):
+        self._tiles = {}
+
+    def _halo_changed(self):
+        self._tiles = {}
@@ -0,0 +1,203 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import logging
+from bisect import bisect_right
+
+from traits.api import HasTraits, Float, Int, List
+
+from .transition import AbstractTransition
+
+logger = logging.getLogger(__name__)
+
+
+class Delay(HasTraits):
+    """ An empty span of time in a timeline """
+
+    duration = Float
+
+    def __init__(self, duration=0.0, **traits):
+        super(Delay, self).__init__(duration=duration, **traits)
+
+
+class Sequence(HasTraits):
+    """ Timeline items which run one after the other """
+
+    items = List
+
+    def __init__(self, *items, **traits):
+        super(Sequence, self).__init__(items=list(items), **traits)
+
+
+class Parallel(HasTraits):
+    """ Timeline items which all start at the same time """
+
+    items = List
+
+    def __init__(self, *items, **traits):
+        super(Parallel, self).__init__(items=list(items), **traits)
+
+
+def compile_item(item, start):
+    """ Flatten a timeline item into (start, end, transition) segments
+
+    Returns the list of segments and the time at which the item ends.
+    """
+    if isinstance(item, AbstractTransition):
+        end = start + item.compute_duration()
+        return [(start, end, item)], end
+    elif isinstance(item, Delay):
+        return [], start + item.duration
+    elif isinstance(item, Sequence):
+        segments = []
+        end = start
+        for child in item.items:
+            child_segments, end = compile_item(child, end)
+            segments.extend(child_segments)
+        return segments, end
+    elif isinstance(item, Parallel):
+        segments = []
+        end = start
+        for child in item.items:
+            child_segments, child_end = compile_item(child, start)
+            segments.extend(child_segments)
+            end = max(end, child_end)
+        return segments, end
+    raise TypeError('Cannot add %r to a timeline' % item)
+
+
+class Timeline(AbstractTransition):
+    """ A composition of transitions run from a single precompiled schedule
+
+    Items are transitions, Delays, Sequences and Parallels, each added at an
+    offset (in seconds) from the start of the timeline.  On start the
+    timeline is compiled into a flat, time-sorted list of segment begin and
+    end events, and each heartbeat finds the events which are due by binary
+    search on time.  Segment boundaries are computed from the timeline's own
+    start time, so chained transitions start exactly when the previous one
+    ends.
+
+    The timeline is registered with the transition manager as a single
+    transition; the transitions within it must not be connected
+    separately.  Timelines may be nested in other timelines.
+
+    Example
+    -------
+    ::
+
+        timeline = Timeline()
+        timeline.add(Sequence(fade_out, Parallel(move, resize), fade_in))
+        timeline.add(highlight, offset=0.5)
+        transition_manager.connect(timeline)
+
+    """
+
+    #: the (offset, item) pairs making up the timeline
+    items = List
+
+    #: the compiled (start, end, transition) segments, in start order
+    segments = List
+
+    #: the times of the compiled begin and end events, in order
+    _event_times = List
+
+    #: the compiled (is_begin, segment index) events, matching _event_times
+    _events = List
+
+    #: the number of events which have been processed
+    _cursor = Int
+
+    #: the indices of the segments which are currently running
+    _active = List
+
+    def add(self, item, offset=0.0):
+        """ Add a transition or composition at an offset from the start """
+        self.items.append((offset, item))
+        return self
+
+    def compile(self):
+        """ Flatten the items into a sorted schedule of segments """
+        segments = []
+        end = 0.0
+        for offset, item in self.items:
+            item_segments, item_end = compile_item(item, offset)
+            segments.extend(item_segments)
+            end = max(end, item_end)
+        segments.sort(key=lambda segment: segment[0])
+        # segments end before others begin at the same instant, so that a
+        # chained transition sees the final value of its predecessor, but
+        # zero-length segments must still begin before they end
+        events = []
+        for i, (start, stop, transition) in enumerate(segments):
+            events.append((start, 1, i))
+            events.append((stop, 0 if stop > start else 2, i))
+        events.sort()
+        self.segments = segments
+        self._event_times = [time for time, kind, i in events]
+        self._events = [(kind == 1, i) for time, kind, i in events]
+        self.duration = end
+
+    def compute_duration(self):
+        self.compile()
+        return self.duration
+
+    def start(self):
+        self.compile()
+        self._cursor = 0
+        self._active = []
+        super(Timeline, self).start()
+
+    def stop(self):
+        super(Timeline, self).stop()
+        for i in self._active:
+            self.segments[i][2].stop()
+        self._active = []
+
+    def listener(self, event):
+        try:
+            done = self.advance(event.time - self.start_time)
+        except Exception as exc:
+            logger.exception(exc)
+            done = True
+        if done:
+            self.state = 'done'
+            self.transition_manager.disconnect(self.key, self)
+
+    def step(self, dt):
+        # when nested in another timeline
+        self.advance(dt*self.duration)
+
+    def advance(self, t):
+        """ Run the timeline to `t` seconds after its start
+
+        Returns True once every segment has finished.
+        """
+        segments = self.segments
+        active = self._active
+        due = bisect_right(self._event_times, t)
+        for is_begin, i in self._events[self._cursor:due]:
+            transition = segments[i][2]
+            if is_begin:
+                transition.transition_manager = self.transition_manager
+                transition.start()
+                active.append(i)
+            else:
+                transition.step(1.0)
+                transition.state = 'done'
+                transition.stop()
+                active.remove(i)
+        self._cursor = due
+
+        for i in active:
+            start, end, transition = segments[i]
+            transition.step((t - start)/(end - start))
+
+        return due == len(self._events)
+
+    def _key_default(self):
+        return self
@@ -6,31 +6,24 @@
 # LICENSE.txt
 #
 
-import sys
-import time
 import logging
+from operator import setitem
 
-from numpy import clip
+from numpy import amax, asarray, clip, copyto, divide, empty, ndim, subtract, \
+    where
 
-from encore.events.api import BaseEventManager, get_event_manager, HeartbeatEvent
-from traits.api import HasTraits, Float, Str, Instance, Any, Property, cached_property
+from traits.api import HasTraits, Float, Str, Dict, Instance, Any, Property, \
+    cached_property
 
-from .easing import Easing
+from .easing import Easing, prepare_easing
 from .transition_manager import TransitionManager
 from .package_globals import get_transition_manager
 
 logger = logging.getLogger(__name__)
 
-if sys.platform == 'win32':
-    accurate_time = time.clock
-else:
-    accurate_time = time.time
-
 
 class AbstractTransition(HasTraits):
     
-    event_manager = Instance(BaseEventManager)
-    
     transition_manager = Instance(TransitionManager)
     
     key = Any
@@ -45,22 +38,30 @@ class AbstractTransition(HasTraits):
     
     priority = Any(0)
     
+    def compute_duration(self):
+        """ Set and return the duration, before the transition is started
+
+        Transitions whose duration depends on their other traits override
+        this, so that eg. a Timeline can schedule them before they start.
+        """
+        return self.duration
+    
     def start(self):
-        self.start_time = accurate_time()
-        self.event_manager.connect(HeartbeatEvent, self.listener,
-            filter={'source': self.transition_manager.heartbeat},
-            priority=self.priority)
+        self.start_time = self.transition_manager.clock.time()
         logging.debug('Started transition key="%s"' % repr(self.key))
     
     def stop(self):
         logging.debug('Stopping transition key="%s"' % repr(self.key))
-        self.event_manager.disconnect(HeartbeatEvent, self.listener)
     
     def step(self, dt):
         pass
     
     def listener(self, event):
-        dt = (event.time-self.start_time)/self.duration
+        if self.duration > 0:
+            dt = (event.time-self.start_time)/self.duration
+        else:
+            # nothing to ease, so jump straight to the end
+            dt = 1.0
         try:
             result = self.step(clip(dt, 0.0, 1.0))
         except Exception as exc:
@@ -68,10 +69,7 @@ class AbstractTransition(HasTraits):
             result = 'done'
         if dt >= 1.0 or result == 'done':
             self.state = 'done'
-            self.transition_manager.disconnect(self.key)
-    
-    def _event_manager_default(self):
-        return get_event_manager()
+            self.transition_manager.disconnect(self.key, self)
     
     def _transition_manager_default(self):
         return get_transition_manager()
@@ -95,13 +93,15 @@ class AttributeTransition(AbstractTransition):
     
     def step(self, dt):
         value = self.ease_(dt, self.initial, self.final)
-        setattr(self.obj, self.attr, value)
+        self.transition_manager.write(self.key, setattr, self.obj, self.attr,
+            value)
         return 'continue'
     
     def stop(self):
         super(AttributeTransition, self).stop()
         self.initial = None # drop reference, just in case
-        setattr(self.obj, self.attr, self.final)
+        self.transition_manager.write(self.key, setattr, self.obj, self.attr,
+            self.final)
     
     @cached_property
     def _get_key(self):
@@ -125,13 +125,15 @@ class ItemTransition(AbstractTransition):
     
     def step(self, dt):
         value = self.ease_(dt, self.initial, self.final)
-        self.obj[self.item] = value
+        self.transition_manager.write(self.key, setitem, self.obj, self.item,
+            value)
         return 'continue'
     
     def stop(self):
         super(ItemTransition, self).stop()
         self.initial = None # drop reference, just in case
-        self.obj[self.item] = self.final
+        self.transition_manager.write(self.key, setitem, self.obj, self.item,
+            self.final)
     
     @cached_property
     def _get_key(self):
@@ -149,21 +151,164 @@ class PlotDataTransition(AbstractTransition):
     
     key = Property(Any, depends_on=['plot_data', 'data_key'])
     
+    #: the easing prepared for the end points, if the easing supports it
+    _prepared = Any
+    
     def start(self):
         self.initial = self.plot_data.get_data(self.data_key)
+        # prepared easings reuse their output buffers, which is not safe if
+        # the values are applied later on the UI thread
+        if self.transition_manager.dispatch == 'same':
+            self._prepared = prepare_easing(self.ease_, self.initial,
+                self.final)
         super(PlotDataTransition, self).start()
     
     def step(self, dt):
-        value = self.ease_(dt, self.initial, self.final)
-        self.plot_data.set_data(self.data_key, value)
+        if self._prepared is not None:
+            value = self._prepared(dt)
+        else:
+            value = self.ease_(dt, self.initial, self.final)
+        self.transition_manager.write(self.key, self.plot_data.set_data,
+            self.data_key, value)
         return 'continue'
 
     def stop(self):
         super(PlotDataTransition, self).stop()
         self.initial = None # drop reference, just in case
+        self._prepared = None
         if self.state == 'done':
-            self.plot_data.set_data(self.data_key, self.final)
+            self.transition_manager.write(self.key, self.plot_data.set_data,
+                self.data_key, self.final)
     
     @cached_property
     def _get_key(self):
         return (self.plot_data, self.data_key)
+
+class StaggeredPlotDataTransition(PlotDataTransition):
+    """ Transition a plot data array with per-element timing
+
+    Each element starts after its own `delay` and takes its own
+    `element_duration`, either of which may be a scalar or an array with one
+    value per element.  Per-element progress is computed in one vectorized
+    step each tick and passed to the easing as an array, so the easing
+    should be one which accepts array-valued progress, such as the 'array_'
+    easings.  The transition finishes when the last element finishes.
+    """
+    
+    #: the delay in seconds before each element starts to move
+    delay = Any(0.0)
+    
+    #: the time in seconds that each element takes to move; elements with
+    #: a duration of 0 jump to their final value after their delay
+    element_duration = Any(1.0)
+    
+    _delay = Any
+    
+    #: the element durations, with 1 in place of zero durations
+    _element_duration = Any
+    
+    #: which elements have zero duration, or None if none do
+    _jumps = Any
+    
+    #: buffer for the per-element progress values
+    _progress = Any
+    
+    def compute_duration(self):
+        self._delay = asarray(self.delay, dtype=float)
+        element_duration = asarray(self.element_duration, dtype=float)
+        jumps = (element_duration == 0)
+        if jumps.any():
+            self._jumps = jumps
+            element_duration = where(jumps, 1.0, element_duration)
+        else:
+            self._jumps = None
+        self._element_duration = element_duration
+        self.duration = float(amax(self._delay + self._element_duration*
+            ~jumps))
+        return self.duration
+    
+    def start(self):
+        self.compute_duration()
+        self._progress = None
+        super(StaggeredPlotDataTransition, self).start()
+    
+    def step(self, dt):
+        progress = self._progress
+        if progress is None:
+            # one progress value per element, broadcastable against the data
+            longer = max(self.initial, self.final, key=len)
+            trailing = (1,)*(ndim(longer)-1)
+            progress = self._progress = empty((len(longer),) + trailing)
+            self._delay = self._delay.reshape(self._delay.shape + trailing)
+            self._element_duration = self._element_duration.reshape(
+                self._element_duration.shape + trailing)
+            if self._jumps is not None:
+                self._jumps = self._jumps.reshape(self._jumps.shape +
+                    trailing)
+        elapsed = dt*self.duration
+        subtract(elapsed, self._delay, out=progress)
+        divide(progress, self._element_duration, out=progress)
+        clip(progress, 0.0, 1.0, out=progress)
+        if self._jumps is not None:
+            copyto(progress, elapsed >= self._delay, where=self._jumps)
+        return super(StaggeredPlotDataTransition, self).step(progress)
+
+    def stop(self):
+        super(StaggeredPlotDataTransition, self).stop()
+        self._progress = None
+
+class PlotDataGroupTransition(AbstractTransition):
+    """ Transition several plot data arrays together on a shared clock
+
+    All of the arrays are eased at each step and then pushed to the plot data
+    with a single `update_data` call, so that listeners (and hence plots) see
+    one data_changed event per frame rather than one per array.
+    """
+    
+    plot_data = Any
+    
+    #: the data arrays at the start of the transition, keyed by name
+    initial = Dict
+    
+    #: the data arrays at the end of the transition, keyed by name
+    final = Dict
+    
+    key = Property(Any, depends_on=['plot_data', 'final'])
+    
+    #: the easings prepared for the end points of each array, if supported
+    _prepared = Dict
+    
+    def start(self):
+        self.initial = dict((name, self.plot_data.get_data(name))
+            for name in self.final)
+        if self.transition_manager.dispatch == 'same':
+            self._prepared = dict((name, prepare_easing(self.ease_,
+                self.initial[name], final))
+                for name, final in self.final.items())
+        super(PlotDataGroupTransition, self).start()
+    
+    def step(self, dt):
+        ease = self.ease_
+        initial = self.initial
+        values = {}
+        for name, final in self.final.items():
+            prepared = self._prepared.get(name)
+            if prepared is not None:
+                values[name] = prepared(dt)
+            else:
+                values[name] = ease(dt, initial[name], final)
+        self.transition_manager.write(self.key, self.plot_data.update_data,
+            values)
+        return 'continue'
+
+    def stop(self):
+        super(PlotDataGroupTransition, self).stop()
+        self.initial = {} # drop references, just in case
+        self._prepared = {}
+        if self.state == 'done':
+            self.transition_manager.write(self.key, self.plot_data.update_data,
+                self.final)
+    
+    @cached_property
+    def _get_key(self):
+        return (self.plot_data, tuple(sorted(self.final)))
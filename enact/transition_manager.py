@@ -7,34 +7,243 @@
 #
 
 import logging
+from collections import deque
+from itertools import count
 
-from encore.events.api import Heartbeat
-from traits.api import HasTraits, Dict, Instance
+from encore.events.api import BaseEventManager, get_event_manager, Heartbeat, \
+    HeartbeatEvent
+from traits.api import HasTraits, Any, Bool, Dict, Enum, Instance, Int
+
+from .clock import AbstractClock, SystemClock, accurate_time
+from .scheduler import ScheduledHeartbeat
+from .staging import StagingBuffer
+from .stats import FrameStats
 
 logger = logging.getLogger(__name__)
 
 
 class TransitionManager(HasTraits):
+    """ Runs a collection of transitions from a single heartbeat
+
+    The manager holds the only HeartbeatEvent subscription; on each tick it
+    steps every connected transition in priority order (higher priority
+    first, ties broken by order of connection).
+
+    A heartbeat created by the manager is suspended while there are no
+    transitions to run, and resumed when one is connected.  A heartbeat
+    supplied by the caller may be shared, eg. with an animated context, so
+    it is left running.
+
+    Connects and disconnects may come from any thread; they are queued and
+    applied by the tick thread at frame boundaries, so the set of running
+    transitions never changes while they are being stepped.
+    """
     
+    #: the currently running transitions, keyed by transition key; this is
+    #: only modified by the thread which runs the ticks
     transitions = Dict
     
+    #: the event manager that we use
+    event_manager = Instance(BaseEventManager)
+    
+    #: the clock which transitions are timed by; with a clock which is not
+    #: real time, no heartbeat is used and the clock's owner calls
+    #: `listener` to run each frame
+    clock = Instance(AbstractClock)
+    
+    #: the heartbeat which drives the transitions
     heartbeat = Instance(Heartbeat)
+    
+    #: the priority of the manager's heartbeat listener; when sharing a
+    #: heartbeat with an animated context, a higher priority than the
+    #: context's runs the transitions before the context renders the frame
+    priority = Int(0)
+    
+    #: where transitions' writes happen: 'same' applies them immediately on
+    #: the tick thread; 'ui' stages each frame's writes and applies the
+    #: latest value for each key in one callback per frame on the UI thread
+    dispatch = Enum('same', 'ui')
+    
+    #: optional statistics about tick timing and the cost of each transition
+    stats = Instance(FrameStats)
+    
+    #: the transitions in stepping order, or None if it needs to be rebuilt
+    _ordered = Any
+    
+    #: the connection order of each running transition, keyed by key
+    _sequence = Dict
+    
+    #: source of connection sequence numbers
+    _counter = Instance(count, ())
+    
+    #: queued (command, argument) pairs from connect and disconnect
+    _commands = Instance(deque, ())
+    
+    #: the writes made during the current frame, when dispatching to the UI
+    _frame_writes = Dict
+    
+    #: the buffer which hands writes over to the UI thread
+    _staging = Instance(StagingBuffer, ())
+    
+    #: whether the heartbeat was created by the manager, and so may be
+    #: suspended while idle
+    _owns_heartbeat = Bool(False)
+    
+    #: the heartbeat which the listener is connected to, if any
+    _subscribed = Any
 
     def connect(self, transition):
-        key = transition.key
-        if key in self.transitions:
-            self.disconnect(key)
-        self.transitions[transition.key] = transition
+        """ Start running a transition, replacing any with the same key
+
+        This may be called from any thread.  The transition is started by
+        the tick thread at the start of the next frame; if its start()
+        fails the error is logged and it is not run.  Connecting a
+        transition which is already running does nothing.
+        """
         transition.transition_manager = self
+        self._commands.append(('connect', transition))
+        if self.clock.real_time:
+            heartbeat = self.heartbeat
+            if self._owns_heartbeat:
+                heartbeat.resume()
+    
+    def disconnect(self, key, transition=None):
+        """ Stop the transition with the given key, if there is one
+
+        This may be called from any thread.  The transition is stopped by the
+        tick thread at the next frame boundary.  If `transition` is given,
+        it is only stopped if it is still the one running with that key, so
+        a transition which disconnects itself can't stop a replacement
+        connected in the meantime.
+        """
+        self._commands.append(('disconnect', (key, transition)))
+    
+    def listener(self, event):
+        self.apply_commands()
+        ordered = self._ordered
+        if ordered is None:
+            ordered = self._ordered = self._order_transitions()
+        stats = self.stats
+        # connects and disconnects are queued, so ordered can't change here
+        if stats is None:
+            for transition in ordered:
+                transition.listener(event)
+        else:
+            tick_start = accurate_time()
+            for transition in ordered:
+                start = accurate_time()
+                transition.listener(event)
+                stats.record_easing(transition.key,
+                    type(transition).__name__, accurate_time()-start)
+            stats.record_frame(event.time, event.interval,
+                accurate_time()-tick_start)
+        # remove transitions which finished during this tick
+        self.apply_commands()
+        if self._frame_writes:
+            self._staging.publish(self._frame_writes)
+            self._frame_writes = {}
+        if (not self.transitions and self.clock.real_time and
+                self._owns_heartbeat):
+            self.heartbeat.suspend()
+            if self.stats is not None:
+                # the time spent suspended isn't missed frames
+                self.stats.restart()
+            # a transition may have been connected while we were suspending
+            if self._commands:
+                self.heartbeat.resume()
+    
+    def write(self, key, function, *args):
+        """ Apply a transition's write of a value, as given by `dispatch`
+
+        Transitions call this rather than setting values directly.  `key`
+        identifies what is being written: in 'ui' mode, a later write with
+        the same key supersedes an earlier one which has not been applied.
+        """
+        if self.dispatch == 'same':
+            function(*args)
+        else:
+            self._frame_writes[key] = (function, args)
+    
+    def apply_commands(self):
+        """ Apply queued connects and disconnects
+
+        This should only be called from the thread which runs the ticks.
+        deque.append and popleft are atomic, so no lock is needed.
+        """
+        commands = self._commands
+        while commands:
+            command, argument = commands.popleft()
+            if command == 'connect':
+                self._connect(argument)
+            else:
+                self._disconnect(*argument)
+    
+    def _connect(self, transition):
+        key = transition.key
+        current = self.transitions.get(key)
+        if current is transition:
+            return
+        if current is not None:
+            self._disconnect(key)
+        try:
+            transition.start()
+        except Exception as exc:
+            # a transition which can't start is never run
+            logger.exception(exc)
+            return
+        self.transitions[key] = transition
+        self._sequence[key] = next(self._counter)
+        self._ordered = None
         logging.debug('Connected transition key="%s"' % repr(key))
-        transition.start()
     
-    def disconnect(self, key):
+    def _disconnect(self, key, transition=None):
+        current = self.transitions.get(key)
+        if current is None or (transition is not None and
+                current is not transition):
+            return
         transition = self.transitions.pop(key)
+        del self._sequence[key]
+        self._ordered = None
+        if self.stats is not None:
+            self.stats.forget(key)
         transition.stop()
         logging.debug('Disconnected transition key="%s"' % repr(key))
+    
+    def _order_transitions(self):
+        sequence = self._sequence
+        return sorted(self.transitions.values(),
+            key=lambda transition: (-transition.priority,
+                sequence[transition.key]))
+
+    def _clock_default(self):
+        return SystemClock()
+
+    def _event_manager_default(self):
+        return get_event_manager()
 
     def _heartbeat_default(self):
-        heartbeat = Heartbeat()
+        heartbeat = ScheduledHeartbeat(event_manager=self.event_manager)
+        self._owns_heartbeat = True
+        self._subscribe(heartbeat)
         heartbeat.serve()
         return heartbeat
+
+    def _heartbeat_changed(self, old, new):
+        # a heartbeat supplied by the caller, rather than by the default
+        self._owns_heartbeat = False
+        if old is not None:
+            self.event_manager.disconnect(HeartbeatEvent, self.listener)
+            self._subscribed = None
+        if new is not None:
+            self._subscribe(new)
+
+    def _priority_changed(self):
+        if self._subscribed is not None:
+            # reconnecting replaces the old subscription
+            self._subscribe(self._subscribed)
+
+    def _subscribe(self, heartbeat):
+        """ Step the transitions on every tick of the heartbeat """
+        self.event_manager.connect(HeartbeatEvent, self.listener,
+            filter={'source': heartbeat}, priority=self.priority)
+        self._subscribed = heartbeat
@@ -0,0 +1,251 @@
+#
+# (C) Copyright 2012 Enthought, Inc., Austin, TX
+# All right reserved.
+#
+# This file is open source software distributed according to the terms in
+# LICENSE.txt
+#
+
+import logging
+from collections import deque
+
+from numpy import empty, zeros, clip, rint, concatenate, where
+
+from traits.api import Any, Bool, Dict, Int, Instance, List
+
+from .easing import easing_curves
+from .transition import AbstractTransition
+
+logger = logging.getLogger(__name__)
+
+
+class AttributeTransitionPool(AbstractTransition):
+    """ A pool of scalar attribute transitions which are eased together
+
+    Each pooled transition behaves like an AttributeTransition of a float or
+    int trait, but the pool keeps start times, durations, initial and final
+    values and easings in parallel arrays.  Every tick computes all of the
+    eased values in one vectorized pass and only then writes them back to
+    their objects.
+
+    The pool registers itself with its transition manager as a single
+    transition while it has work to do, and disconnects once empty.
+
+    Example
+    -------
+    ::
+
+        pool = AttributeTransitionPool()
+        for marker, size in zip(markers, sizes):
+            pool.add(marker, 'size', size, duration=0.5, ease='ease_in')
+
+    """
+
+    #: the number of transitions currently in the pool
+    size = Int
+
+    #: the names of the distinct easing curves used by the pool
+    curve_names = List
+
+    #: the objects being transitioned, in array order
+    _objs = List
+
+    #: the attributes being transitioned, in array order
+    _attrs = List
+
+    #: the array row of each transition, keyed by (obj, attr)
+    _rows = Dict
+
+    #: transitions added since the last tick, applied by the tick thread
+    _pending = Instance(deque, ())
+
+    #: whether the pool has disconnected itself because it ran out of work
+    _finished = Bool(False)
+
+    # the parallel arrays which hold the transition state
+    _start_time = Any
+    _duration = Any
+    _initial = Any
+    _final = Any
+    _ease_id = Any
+    _is_int = Any
+
+    def add(self, obj, attr, final, duration=1.0, ease='linear'):
+        """ Add a transition of `obj.attr` to the pool
+
+        Parameters
+        ----------
+        obj : object
+            The object holding the attribute.
+        attr : str
+            The name of a float or int attribute.
+        final : number
+            The value that the attribute will end at.
+        duration : float
+            The length of the transition in seconds.
+        ease : str
+            The name of an Easing, such as 'linear' or 'int_ease_in'.  Names
+            with an 'int_' prefix round the eased value to an integer.
+
+        """
+        is_int = ease.startswith('int_')
+        curve_name = ease[4:] if is_int else ease
+        if curve_name not in easing_curves:
+            raise ValueError('Unknown easing "%s"' % ease)
+        self._pending.append((obj, attr, final, float(duration), curve_name,
+            is_int, self.transition_manager.clock.time()))
+        # does nothing if the pool is already running
+        self.transition_manager.connect(self)
+
+    def stop(self):
+        super(AttributeTransitionPool, self).stop()
+        # anything still running jumps to its final value; anything pending
+        # is kept for when the pool is next connected
+        self._finish_all()
+        if self._finished:
+            self._finished = False
+            if self._pending:
+                # added after the pool decided it was empty, while the
+                # connect was a no-op because the pool was still running
+                self.transition_manager.connect(self)
+
+    def listener(self, event):
+        try:
+            self._apply_pending()
+            self.step_pool(event.time)
+        except Exception as exc:
+            logger.exception(exc)
+            # don't leave the objects part way through their transitions
+            self._finish_all()
+        if self.size == 0 and not self._pending:
+            self.state = 'done'
+            self._finished = True
+            self.transition_manager.disconnect(self.key, self)
+
+    def step_pool(self, time):
+        """ Ease every pooled transition to the given time """
+        n = self.size
+        if n == 0:
+            return
+        duration = self._duration[:n]
+        positive = duration > 0.0
+        dt = (time - self._start_time[:n])/where(positive, duration, 1.0)
+        # zero length transitions jump straight to their final values
+        dt[~positive] = 1.0
+        done = dt >= 1.0
+        clip(dt, 0.0, 1.0, out=dt)
+
+        ease_id = self._ease_id[:n]
+        if len(self.curve_names) == 1:
+            eased = easing_curves[self.curve_names[0]](dt)
+        else:
+            eased = empty(n)
+            for i, name in enumerate(self.curve_names):
+                mask = (ease_id == i)
+                if mask.any():
+                    eased[mask] = easing_curves[name](dt[mask])
+
+        initial = self._initial[:n]
+        values = initial + (self._final[:n]-initial)*eased
+        is_int = self._is_int[:n]
+        if is_int.any():
+            values[is_int] = rint(values[is_int])
+
+        # only now write back to the objects
+        write = self.transition_manager.write
+        for obj, attr, value, integer in zip(self._objs, self._attrs,
+                values.tolist(), is_int.tolist()):
+            write((obj, attr), setattr, obj, attr,
+                int(value) if integer else value)
+
+        if done.any():
+            self._remove(done)
+
+    def _apply_pending(self):
+        pending = self._pending
+        while pending:
+            obj, attr, final, duration, curve_name, is_int, start_time = \
+                pending.popleft()
+            key = (obj, attr)
+            row = self._rows.get(key)
+            if row is not None:
+                # like reconnecting an AttributeTransition: the old one
+                # finishes at its final value before the new one starts
+                self._finish_row(row)
+            else:
+                row = self._append_row(obj, attr)
+            if curve_name not in self.curve_names:
+                self.curve_names.append(curve_name)
+            self._start_time[row] = start_time
+            self._duration[row] = duration
+            self._initial[row] = getattr(obj, attr)
+            self._final[row] = final
+            self._ease_id[row] = self.curve_names.index(curve_name)
+            self._is_int[row] = is_int
+
+    def _append_row(self, obj, attr):
+        row = self.size
+        if self._start_time is None or row >= len(self._start_time):
+            self._grow(max(16, 2*row))
+        self._objs.append(obj)
+        self._attrs.append(attr)
+        self._rows[(obj, attr)] = row
+        self.size = row + 1
+        return row
+
+    def _finish_row(self, row):
+        value = self._final[row]
+        if self._is_int[row]:
+            value = int(round(value))
+        obj = self._objs[row]
+        attr = self._attrs[row]
+        self.transition_manager.write((obj, attr), setattr, obj, attr, value)
+
+    def _remove(self, done):
+        """ Finish and drop the rows flagged in the boolean array `done` """
+        n = self.size
+        for row in done.nonzero()[0]:
+            self._finish_row(row)
+        keep = ~done
+        m = int(keep.sum())
+        for name in ('_start_time', '_duration', '_initial', '_final',
+                '_ease_id', '_is_int'):
+            array = getattr(self, name)
+            array[:m] = array[:n][keep]
+        keep_rows = keep.tolist()
+        self._objs = [obj for obj, k in zip(self._objs, keep_rows) if k]
+        self._attrs = [attr for attr, k in zip(self._attrs, keep_rows) if k]
+        self._rows = dict(((obj, attr), row) for row, (obj, attr)
+            in enumerate(zip(self._objs, self._attrs)))
+        self.size = m
+
+    def _finish_all(self):
+        """ Write every row's final value and empty the pool """
+        for row in range(self.size):
+            try:
+                self._finish_row(row)
+            except Exception as exc:
+                logger.exception(exc)
+        self._clear()
+
+    def _grow(self, capacity):
+        def extend(array, dtype):
+            new = zeros(capacity, dtype=dtype)
+            if array is not None:
+                new = concatenate([array, new[len(array):]])
+            return new
+        self._start_time = extend(self._start_time, float)
+        self._duration = extend(self._duration, float)
+        self._initial = extend(self._initial, float)
+        self._final = extend(self._final, float)
+        self._ease_id = extend(self._ease_id, int)
+        self._is_int = extend(self._is_int, bool)
+
+    def _clear(self):
+        self._objs = []
+        self._attrs = []
+        self._rows = {}
+        self.size = 0
+
+    def _key_default(self):
+        return self
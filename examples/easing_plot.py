@@ -10,9 +10,10 @@ import numpy
 
 from traits.api import HasTraits, Button, Array, Range, Any, Instance, Property
 from traitsui.api import View, UItem
-from enact.api import get_transition_manager, AttributeTransition, PlotDataTransition
+from enact.api import get_transition_manager, AttributeTransition, \
+    AnimatedPlotData
 from enable.api import ComponentEditor
-from chaco.api import ArrayPlotData, Plot, jet
+from chaco.api import Plot, jet
 
 NUM_POINTS = 10000
 TIME_LENGTH = 100
@@ -27,7 +28,7 @@ class EasingPlot(HasTraits):
     
     play = Button
     
-    plot_data = Instance(ArrayPlotData)
+    plot_data = Instance(AnimatedPlotData)
 
     plot = Instance(Plot)
     
@@ -46,11 +47,12 @@ class EasingPlot(HasTraits):
         return self.data[self.time]
     
     def _plot_data_default(self):
-        plot_data = ArrayPlotData(
+        plot_data = AnimatedPlotData(
             x=self.current_data[:,0],
             y=self.current_data[:,1],
             z=self.current_data[:,2]
         )
+        plot_data.transition_manager = self.transition_manager
         return plot_data
     
     def _plot_default(self):
@@ -77,30 +79,14 @@ class EasingPlot(HasTraits):
         self.current_data = self.data[self.time]
     
     def _current_data_changed(self):
-        transition_x = PlotDataTransition(
+        self.plot_data.set_animated({
+                'x': self.current_data[:,0],
+                'y': self.current_data[:,1],
+                'z': self.current_data[:,2],
+            },
             ease = 'ease_in',
-            plot_data = self.plot_data,
-            data_key = 'x',
             duration = 1.0,
-            final = self.current_data[:,0],
         )
-        transition_y = PlotDataTransition(
-            ease = 'ease_in',
-            plot_data = self.plot_data,
-            data_key = 'y',
-            duration = 1.0,
-            final = self.current_data[:,1],
-        )
-        transition_z = PlotDataTransition(
-            ease = 'ease_in',
-            plot_data = self.plot_data,
-            data_key = 'z',
-            duration = 1.0,
-            final = self.current_data[:,2],
-        )
-        self.transition_manager.connect(transition_x)
-        self.transition_manager.connect(transition_y)
-        self.transition_manager.connect(transition_z)
     
     view = View(
         UItem('plot', editor=ComponentEditor()),
@@ -21,13 +21,13 @@ class Life(AbstractAnimatedContext):
     def start(self):
         with self.gc_lock:
             gc = self.gc
-            self.board = numpy.zeros((gc.width(), gc.height(), 1), dtype='uint8')
-            self.board[1:-1,1:-1] = numpy.random.randint(0,2, (gc.width()-2, gc.height()-2, 1))
-            self.image_arr = numpy.empty((gc.width(), gc.height(), 3), dtype='uint8')
-            self.image_arr[:,:,:] = -self.board
-            self.image = GraphicsContext(self.image_arr, pix_format='rgb24')
-            with gc:
-                gc.draw_image(self.image)
+            self.board = numpy.zeros((gc.height(), gc.width(), 1), dtype='uint8')
+            self.board[1:-1,1:-1] = numpy.random.randint(0,2, (gc.height()-2, gc.width()-2, 1))
+            # write the board straight into the gc's pixels: grey levels
+            # don't care about the channel order, and alpha is opaque
+            pixels = self.pixels
+            pixels[:,:,:3] = -self.board
+            pixels[:,:,3] = 255
         super(Life, self).start()
     
     def step(self, frame_count):
@@ -39,12 +39,7 @@ class Life(AbstractAnimatedContext):
         live = ((self.board[1:-1,1:-1] & (neighbours >= 2) & (neighbours <= 3)) |
             ((~self.board[1:-1,1:-1]) & (neighbours == 3)))
         self.board[1:-1,1:-1] = live
-        self.image_arr[:] = -self.board
-
-        gc = self.gc
-        
-        with gc:
-            gc.draw_image(self.image)
+        self.pixels[:,:,:3] = -self.board
     
     def _gc_default(self):
         gc = GraphicsContext((512, 512))
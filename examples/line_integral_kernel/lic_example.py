@@ -12,7 +12,8 @@ from traits.api import HasTraits, Button, Instance
 from traitsui.api import View, UItem
 from kiva.image import GraphicsContext
 from enable.api import ComponentEditor
-from enact.api import AnimatedComponent, AbstractAnimatedContext
+from enact.api import AnimatedComponent, AbstractAnimatedContext, \
+    FrameRateGovernor, ResolutionGovernor
 
 import lic_internal
 
@@ -20,11 +21,14 @@ class LineIntegralConvolution(AbstractAnimatedContext):
     
     frame_rate = 30.
     
+    # start at half resolution and let the scale governor adjust it
+    render_scale = 0.5
+    
     def start(self):
-        
-        width = self.gc.width()/2.
-        height = self.gc.height()/2.
-        
+        self.field_size = None
+        super(LineIntegralConvolution, self).start()
+    
+    def make_field(self, width, height):
         vortex_spacing = 0.5
         extra_factor = 2.
         
@@ -38,17 +42,23 @@ class LineIntegralConvolution(AbstractAnimatedContext):
         xs = np.linspace(-1,1,width).astype(np.float32)[None,:]
         ys = np.linspace(-1,1,height).astype(np.float32)[:,None]
         
-        self.vectors = np.zeros((width,height,2),dtype=np.float32)
+        self.vectors = np.zeros((height,width,2),dtype=np.float32)
         for (x,y) in vortices:
             rsq = (xs-x)**2+(ys-y)**2
             self.vectors[...,0] +=  (ys-y)/rsq
             self.vectors[...,1] += -(xs-x)/rsq
             
-        self.texture = np.random.rand(width,height).astype(np.float32)
-
-        super(LineIntegralConvolution, self).start()
+        self.texture = np.random.rand(height,width).astype(np.float32)
+        self.field_size = (width, height)
     
     def step(self, frame_count):
+        # render at the current render scale; the context upscales the
+        # result into the gc
+        gc = self.render_gc
+        width, height = gc.width(), gc.height()
+        if self.field_size != (width, height):
+            self.make_field(width, height)
+        
         kernellen = 31
         t = frame_count/(16*5.)
         kernel = np.sin(np.arange(kernellen)*np.pi/kernellen)*(1+np.sin(2*np.pi*5*(np.arange(kernellen)/float(kernellen)+t)))
@@ -59,19 +69,23 @@ class LineIntegralConvolution(AbstractAnimatedContext):
             self.texture, kernel)
         image1.shape = (-1,)
         image = np.digitize(image1, np.linspace(0., 32., 256))
-        image.shape = (self.gc.width()/2., self.gc.height()/2., 1)
-        
-        self.image = np.empty(image.shape[:2]+(3,), dtype='uint8')
-        self.image[:,:,:] = image
+        image.shape = (height, width, 1)
         
-        gc = self.gc
-        
-        with gc:
-            gc.draw_image(self.image, (0, 0, 512, 512))
+        pixels = gc.bmp_array
+        pixels[:,:,:3] = image
+        pixels[:,:,3] = 255
     
     def _gc_default(self):
         gc = GraphicsContext((512, 512))
         return gc
+    
+    def _governor_default(self):
+        # the convolution is expensive, so drop the frame rate on slow
+        # machines once the scale governor can't lower the resolution further
+        return FrameRateGovernor()
+    
+    def _scale_governor_default(self):
+        return ResolutionGovernor()
         
 class LineIntegralConvolutionView(HasTraits):
     
@@ -83,7 +83,8 @@ class MouseInteraction(InteractiveContext):
             return self.circle_grid()
     
     def _transition_manager_default(self):
-        return TransitionManager(heartbeat=self.heartbeat)
+        # share the animation's heartbeat, running the transitions first
+        return TransitionManager(heartbeat=self.heartbeat, priority=1)
     
     def _random_changed(self):
         if self.random:
@@ -12,7 +12,7 @@ setup(
     url='https://github.com/enthought/enact',
     description='Animation support for Traits and Chaco',
     long_description=open('README.rst').read(),
-    packages=find_packages(exclude=('*.tests',)),
+    packages=find_packages(exclude=('*.tests', 'benchmarks', 'benchmarks.*')),
     requires=[],
     install_requires=['distribute', 'encore', 'traits', 'chaco'],
 )